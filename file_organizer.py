@@ -1,12 +1,40 @@
 #!/usr/bin/env python3
 """
 File Organizer - Automatically organizes files by type
-Usage: python3 file_organizer.py [directory]
+Usage: python3 file_organizer.py [directory] [--workers N] [--dedupe skip|move|hardlink]
+       python3 file_organizer.py [directory] --recursive [--workers N]
+       python3 file_organizer.py [directory] --journal   # incremental, undoable runs
+       python3 file_organizer.py [directory] --undo      # revert the last journaled run
+       python3 file_organizer.py [directory] --watch     # keep organizing new files
+       python3 file_organizer.py [directory] --sniff     # classify unknown files by content
+       python3 file_organizer.py [directory] --dry-run [--plan-format json|csv] [--plan-out FILE]
+       python3 file_organizer.py [directory] --output /mnt/archive  # category folders elsewhere
+       python3 file_organizer.py --benchmark
 """
 
 import os
+import re
+import csv
 import sys
+import json
+import time
+import errno
+import shutil
+import contextlib
+import mmap
+import queue
+import select
+import struct
+import sqlite3
+import ctypes
+import ctypes.util
+import hashlib
+import threading
+import argparse
+import tempfile
 from pathlib import Path
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 # File type mappings
 FILE_TYPES = {
@@ -15,59 +43,1145 @@ FILE_TYPES = {
     'Audio': ['.mp3', '.wav', '.flac', '.aac', '.m4a', '.ogg'],
     'Documents': ['.pdf', '.doc', '.docx', '.txt', '.rtf', '.odt', '.xls', '.xlsx', '.ppt', '.pptx'],
     'Code': ['.py', '.js', '.html', '.css', '.java', '.c', '.cpp', '.go', '.rs', '.ts'],
-    'Archives': ['.zip', '.rar', '.7z', '.tar', '.gz', '.bz2'],
+    'Archives': ['.zip', '.rar', '.7z', '.tar', '.gz', '.bz2', '.tgz', '.tar.gz', '.tar.bz2', '.tar.xz'],
     'Data': ['.json', '.xml', '.csv', '.yaml', '.yml', '.sql'],
 }
 
+# Moves handed to one worker at a time
+MOVE_BATCH_SIZE = 256
+
+# Cross-filesystem copies: max bytes per copy_file_range/sendfile call
+COPY_CHUNK = 8 * 1024 * 1024
+
+# Dedupe: bytes hashed from each end for the partial hash, and chunk size for full reads
+HASH_BLOCK = 64 * 1024
+HASH_CHUNK = 1024 * 1024
+DUPLICATES_DIR = 'Duplicates'
+
+# Recursive mode: max entries buffered between the walker and the movers,
+# and how many are planned and moved at a time
+WALK_QUEUE_SIZE = 10_000
+WALK_CHUNK_SIZE = 4096
+
+# State files kept inside the organized directory; scans skip anything with this prefix.
+# The journal is the SQLite database for incremental runs, the WAL holds the plan being applied.
+STATE_PREFIX = '.file_organizer'
+JOURNAL_NAME = STATE_PREFIX + '.db'
+PLAN_WAL_NAME = STATE_PREFIX + '.wal'
+
+# Watch mode: quiet period before a file is moved, max files per micro-batch,
+# polling fallback interval and how often counters are printed (seconds)
+WATCH_DEBOUNCE = 1.0
+WATCH_BATCH_SIZE = 512
+WATCH_POLL_INTERVAL = 2.0
+WATCH_STATS_INTERVAL = 60.0
+# Names browsers and downloaders use while a file is still being written
+TEMP_SUFFIXES = ('.part', '.partial', '.crdownload', '.download', '.tmp', '.swp')
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+_INOTIFY_EVENT = struct.Struct('iIII')
+
+# Content sniffing: bytes read from the start of files with an unknown extension,
+# and (signature regex matched at offset 0, category); first match wins
+SNIFF_BYTES = 512
+MAGIC_SIGNATURES = [
+    (rb'\x89PNG\r\n\x1a\n', 'Images'),
+    (rb'\xff\xd8\xff', 'Images'),
+    (rb'GIF8[79]a', 'Images'),
+    (rb'RIFF....WEBP', 'Images'),
+    (rb'%PDF-', 'Documents'),
+    (rb'\{\\rtf', 'Documents'),
+    (rb'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'Documents'),
+    (rb'....ftypM4A', 'Audio'),
+    (rb'....ftyp', 'Videos'),
+    (rb'\x1a\x45\xdf\xa3', 'Videos'),
+    (rb'RIFF....AVI ', 'Videos'),
+    (rb'RIFF....WAVE', 'Audio'),
+    (rb'ID3', 'Audio'),
+    (rb'fLaC', 'Audio'),
+    (rb'OggS', 'Audio'),
+    (rb'PK\x03\x04', 'Archives'),
+    (rb'Rar!\x1a\x07', 'Archives'),
+    (rb'7z\xbc\xaf\x27\x1c', 'Archives'),
+    (rb'\x1f\x8b', 'Archives'),
+    (rb'BZh', 'Archives'),
+    (rb'\xfd7zXZ\x00', 'Archives'),
+    (rb'SQLite format 3\x00', 'Data'),
+    (rb'<\?xml', 'Data'),
+]
+_MAGIC = re.compile(b'|'.join(b'(' + sig + b')' for sig, _ in MAGIC_SIGNATURES), re.DOTALL)
+
+# Extension -> category index, built from FILE_TYPES by rebuild_index()
+_EXT_INDEX = {}
+# Multi-part extensions (e.g. '.tar.gz'), longest first
+_MULTI_EXTS = ()
+
+def rebuild_index():
+    """Rebuild the extension lookup index; call again after changing FILE_TYPES"""
+    global _EXT_INDEX, _MULTI_EXTS
+    index = {}
+    for category, extensions in FILE_TYPES.items():
+        for ext in extensions:
+            # First category wins, same as the old linear scan
+            index.setdefault(ext.lower(), category)
+    _EXT_INDEX = index
+    _MULTI_EXTS = tuple(sorted((e for e in index if e.count('.') > 1), key=len, reverse=True))
+
 def get_category(ext):
     """Get category for a file extension"""
+    return _EXT_INDEX.get(ext.lower(), 'Others')
+
+def split_ext(name):
+    """Split a file name into (stem, ext), keeping multi-part extensions like .tar.gz"""
+    lower = name.lower()
+    for ext in _MULTI_EXTS:
+        if lower.endswith(ext) and len(name) > len(ext):
+            return name[:-len(ext)], name[-len(ext):]
+    return os.path.splitext(name)
+
+rebuild_index()
+
+def _get_category_linear(ext):
+    """Original linear-scan lookup, kept for benchmarking"""
     ext = ext.lower()
     for category, extensions in FILE_TYPES.items():
         if ext in extensions:
             return category
     return 'Others'
 
-def organize_files(directory):
-    """Organize files in directory by type"""
-    directory = Path(directory)
-    
-    if not directory.exists():
-        print(f"Error: Directory '{directory}' does not exist")
+def benchmark_classify(count=1_000_000):
+    """Compare classification throughput of the index against the linear scan"""
+    exts = [ext for _, ext in zip(range(count), _sample_exts())]
+
+    start = time.perf_counter()
+    for ext in exts:
+        _get_category_linear(ext)
+    linear = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for ext in exts:
+        get_category(ext)
+    indexed = time.perf_counter() - start
+
+    print(f"📊 Classifying {count:,} extensions")
+    print(f"   linear scan: {count / linear:>12,.0f} lookups/sec")
+    print(f"   index:       {count / indexed:>12,.0f} lookups/sec ({linear / indexed:.1f}x)")
+
+def _sample_exts():
+    """Endless cycle of known and unknown extensions"""
+    exts = [e for extensions in FILE_TYPES.values() for e in extensions] + ['.unknown', '', '.JPG']
+    while True:
+        yield from exts
+
+def scan_files(directory):
+    """Scan directory once, returning DirEntry objects for regular files"""
+    # DirEntry caches d_type, so is_file() needs no extra stat on most filesystems
+    with os.scandir(directory) as it:
+        return [entry for entry in it
+                if entry.is_file() and not entry.name.startswith(STATE_PREFIX)]
+
+class NameIndex:
+    """In-memory index of the names in each category folder, built once per run"""
+
+    def __init__(self):
+        self._names = {}    # category_dir -> set of names
+        self._highest = {}  # (category_dir, stem, ext) -> highest _N suffix
+
+    def _load(self, category_dir):
+        """Read a category folder's names once"""
+        names = set()
+        self._names[category_dir] = names
+        try:
+            with os.scandir(category_dir) as it:
+                for entry in it:
+                    self._add(category_dir, names, entry.name)
+        except FileNotFoundError:
+            pass
+        return names
+
+    def _add(self, category_dir, names, name):
+        """Record a name and track the highest numeric suffix for its stem"""
+        names.add(name)
+        stem, ext = split_ext(name)
+        base, sep, num = stem.rpartition('_')
+        if sep and num.isdigit():
+            key = (category_dir, base, ext)
+            if int(num) > self._highest.get(key, 0):
+                self._highest[key] = int(num)
+
+    def claim(self, category_dir, name):
+        """Reserve a free name in category_dir, adding _N on conflicts"""
+        names = self._names.get(category_dir)
+        if names is None:
+            names = self._load(category_dir)
+
+        if name in names:
+            stem, ext = split_ext(name)
+            counter = self._highest.get((category_dir, stem, ext), 0) + 1
+            name = f"{stem}_{counter}{ext}"
+            while name in names:
+                counter += 1
+                name = f"{stem}_{counter}{ext}"
+
+        self._add(category_dir, names, name)
+        return os.path.join(category_dir, name)
+
+def walk_files(directory, skip=()):
+    """Yield DirEntry objects for regular files under directory, depth-first
+
+    Top-level folders named in skip (the category folders) are not entered.
+    """
+    root = os.fspath(directory)
+    stack = [root]
+    while stack:
+        path = stack.pop()
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not (path == root and entry.name in skip):
+                            stack.append(entry.path)
+                    elif entry.is_file():
+                        if not (path == root and entry.name.startswith(STATE_PREFIX)):
+                            yield entry
+        except OSError as e:
+            print(f"✗ Cannot read {path}: {e}")
+
+def stream(items, maxsize=WALK_QUEUE_SIZE):
+    """Produce items in a background thread, handing them over a bounded queue"""
+    q = queue.Queue(maxsize)
+    done = object()
+
+    def produce():
+        try:
+            for item in items:
+                q.put(item)
+        finally:
+            q.put(done)
+
+    threading.Thread(target=produce, daemon=True).start()
+    while True:
+        item = q.get()
+        if item is done:
+            return
+        yield item
+
+def chunked(items, size):
+    """Group an iterable into lists of at most size items"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def sniff_category(head):
+    """Category for the first bytes of a file, 'Others' if no signature matches"""
+    match = _MAGIC.match(head)
+    return MAGIC_SIGNATURES[match.lastindex - 1][1] if match else 'Others'
+
+def _read_head(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read(SNIFF_BYTES)
+    except OSError:
+        return None
+
+class Sniffer:
+    """Classifies files with unknown extensions by magic bytes, cached by (inode, mtime, size)
+
+    Only files that stay where they are keep a cache row: forget() drops the
+    rows of files once they have been moved out.
+    """
+
+    def __init__(self, directory, workers=4, readonly=False):
+        path = Path(directory) / JOURNAL_NAME
+        self.cache = {}
+        if readonly:
+            # Dry runs use an existing cache but never create or write files in the tree
+            self.db = None
+            if path.exists():
+                db = sqlite3.connect(path.resolve().as_uri() + '?mode=ro', uri=True)
+                try:
+                    self.cache = self._load(db)
+                except sqlite3.OperationalError:
+                    pass
+                finally:
+                    db.close()
+        else:
+            # Shares the journal database file; the cache lives in its own table
+            self.db = sqlite3.connect(path)
+            self.db.execute('PRAGMA journal_mode=PERSIST')
+            self.db.execute("""CREATE TABLE IF NOT EXISTS sniff (
+                dev INTEGER, ino INTEGER, mtime_ns INTEGER, size INTEGER, category TEXT,
+                PRIMARY KEY (dev, ino))""")
+            self.cache = self._load(self.db)
+        self.pool = ThreadPoolExecutor(max_workers=max(workers, 1))
+        self.keys = {}  # path -> (dev, ino) of every file classified
+        self.reads = 0
+        self.hits = 0
+
+    @staticmethod
+    def _load(db):
+        return {(dev, ino): (mtime, size, category) for dev, ino, mtime, size, category
+                in db.execute('SELECT * FROM sniff')}
+
+    def close(self):
+        self.pool.shutdown()
+        if self.db:
+            self.db.close()
+
+    def classify(self, entries):
+        """Return {path: category} for entries whose extension is unknown"""
+        result = {}
+        misses = []
+        for entry in entries:
+            if get_category(split_ext(entry.name)[1]) != 'Others':
+                continue
+            st = entry.stat()
+            key = (st.st_dev, st.st_ino)
+            self.keys[entry.path] = key
+            cached = self.cache.get(key)
+            if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+                result[entry.path] = cached[2]
+                self.hits += 1
+            else:
+                misses.append((entry.path, key, st.st_mtime_ns, st.st_size))
+
+        rows = []
+        for (path, key, mtime, size), head in zip(misses, self.pool.map(_read_head, [m[0] for m in misses])):
+            if head is None:
+                continue
+            category = sniff_category(head)
+            result[path] = category
+            self.cache[key] = (mtime, size, category)
+            rows.append((*key, mtime, size, category))
+        self.reads += len(rows)
+
+        if rows and self.db:
+            self.db.executemany('INSERT OR REPLACE INTO sniff VALUES (?, ?, ?, ?, ?)', rows)
+            self.db.commit()
+        return result
+
+    def forget(self, paths):
+        """Drop the cache rows of classified files that have been moved"""
+        keys = [self.keys.pop(path) for path in paths if path in self.keys]
+        for key in keys:
+            self.cache.pop(key, None)
+        if keys and self.db:
+            self.db.executemany('DELETE FROM sniff WHERE dev = ? AND ino = ?', keys)
+            self.db.commit()
+
+def benchmark_sniff(count=5000):
+    """Measure the per-file cost of content sniffing, cold and cached"""
+    heads = [b'\x89PNG\r\n\x1a\n', b'\xff\xd8\xff\xe0', b'%PDF-1.7', b'PK\x03\x04',
+             b'\0\0\0\x18ftypisom', b'ID3\x04', b'no signature here']
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(count):
+            with open(os.path.join(tmp, f"upload{i}"), 'wb') as f:
+                f.write(heads[i % len(heads)] + os.urandom(SNIFF_BYTES))
+
+        print(f"📊 Sniffing {count:,} extension-less files")
+        sniffer = Sniffer(tmp)
+        try:
+            for label in ('cold', 'cached'):
+                start = time.perf_counter()
+                sniffer.classify(scan_files(tmp))
+                elapsed = time.perf_counter() - start
+                print(f"   sniff ({label}): {elapsed / count * 1e6:>8.1f} µs/file")
+        finally:
+            sniffer.close()
+
+def plan_moves(root, entries, names=None, sniffed=None):
+    """Build the move plan: list of (source, target, category, link_source) string tuples
+
+    Targets go into category folders under root.
+    """
+    plan = []
+    names = names or NameIndex()
+    for entry in entries:
+        category = (sniffed and sniffed.get(entry.path)) or get_category(split_ext(entry.name)[1])
+        new_path = names.claim(root / category, entry.name)
+        plan.append((entry.path, new_path, category, None))
+    return plan
+
+def split_by_size(entries):
+    """Split entries into (unique_size, same_size_candidates) for dedupe"""
+    by_size = defaultdict(list)
+    for entry in entries:
+        by_size[entry.stat().st_size].append(entry)
+
+    unique, candidates = [], []
+    for size, group in by_size.items():
+        # Empty files are never treated as duplicates
+        if size == 0 or len(group) == 1:
+            unique.extend(group)
+        else:
+            candidates.extend(group)
+    return unique, candidates
+
+def _partial_hash(path):
+    """Hash the first and last HASH_BLOCK bytes (the whole file if it is small)"""
+    try:
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            h.update(f.read(HASH_BLOCK))
+            size = os.fstat(f.fileno()).st_size
+            if size > HASH_BLOCK:
+                f.seek(max(size - HASH_BLOCK, HASH_BLOCK))
+                h.update(f.read(HASH_BLOCK))
+        return h.hexdigest()
+    except OSError:
+        return None
+
+def _full_hash(path):
+    """Hash a whole file through mmap, falling back to fixed-size chunk reads"""
+    try:
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    h.update(mm)
+            except (ValueError, OSError):
+                for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+                    h.update(chunk)
+        return h.hexdigest()
+    except OSError:
+        return None
+
+def _group_by(keyed_paths):
+    """Group (key, path) pairs, keeping groups with more than one path"""
+    groups = defaultdict(list)
+    for key, path in keyed_paths:
+        if key[-1] is not None:
+            groups[key].append(path)
+    return [group for group in groups.values() if len(group) > 1]
+
+def find_duplicates(candidates, pool):
+    """Map each duplicate path to the path of the copy that is kept"""
+    sizes = {entry.path: entry.stat().st_size for entry in candidates}
+    paths = sorted(sizes)
+
+    # Same size -> same first/last blocks
+    partial = pool.map(_partial_hash, paths, chunksize=64)
+    groups = _group_by(((sizes[p], h), p) for p, h in zip(paths, partial))
+
+    # Small files were hashed whole by the partial pass
+    confirmed = [g for g in groups if sizes[g[0]] <= 2 * HASH_BLOCK]
+    to_hash = [p for g in groups if sizes[g[0]] > 2 * HASH_BLOCK for p in g]
+    full = pool.map(_full_hash, to_hash, chunksize=4)
+    confirmed += _group_by(((sizes[p], h), p) for p, h in zip(to_hash, full))
+
+    duplicates = {}
+    for group in confirmed:
+        keep = min(group)
+        for path in group:
+            if path != keep:
+                duplicates[path] = keep
+    return duplicates
+
+def plan_dedupe(root, candidates, duplicates, mode, names, sniffed=None):
+    """Build the move plan for dedupe candidates, with category folders under root"""
+    plan = []
+    for entry in candidates:
+        original = duplicates.get(entry.path)
+        if original is None:
+            plan.extend(plan_moves(root, [entry], names, sniffed))
+        elif mode == 'move':
+            new_path = names.claim(root / DUPLICATES_DIR, entry.name)
+            plan.append((entry.path, new_path, DUPLICATES_DIR, None))
+        elif mode == 'hardlink':
+            # Link to the kept copy before it moves, then drop the duplicate
+            src, new_path, category, _ = plan_moves(root, [entry], names, sniffed)[0]
+            plan.append((src, new_path, category, original))
+    return plan
+
+def _copy_fd(infd, outfd, size):
+    """Copy size bytes between file descriptors, in-kernel when the platform allows"""
+    copied = 0
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while copied < size:
+                n = os.copy_file_range(infd, outfd, min(COPY_CHUNK, size - copied))
+                if n == 0:
+                    break
+                copied += n
+            return copied
+        except OSError as e:
+            # Older kernels refuse cross-filesystem ranges; anything else is a real error
+            if copied or e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+                raise
+
+    if hasattr(os, 'sendfile') and sys.platform.startswith('linux'):
+        while copied < size:
+            n = os.sendfile(outfd, infd, copied, min(COPY_CHUNK, size - copied))
+            if n == 0:
+                break
+            copied += n
+        return copied
+
+    while True:
+        chunk = os.read(infd, COPY_CHUNK)
+        if not chunk:
+            return copied
+        os.write(outfd, chunk)
+        copied += len(chunk)
+
+def _copy_file(src, dst):
+    """Copy src to dst through a fsynced temp file and an atomic replace; returns bytes copied"""
+    tmp = os.path.join(os.path.dirname(dst),
+                       f".{os.path.basename(dst)}.{os.getpid()}.{threading.get_ident()}.part")
+    try:
+        with open(src, 'rb') as fsrc, open(tmp, 'wb') as fdst:
+            copied = _copy_fd(fsrc.fileno(), fdst.fileno(), os.fstat(fsrc.fileno()).st_size)
+            os.fsync(fdst.fileno())
+        shutil.copystat(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+    _fsync_dir(os.path.dirname(dst) or '.')
+    return copied
+
+def _fsync_dir(path):
+    """Make a rename in path durable before the caller drops the other copy"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return  # Windows cannot open directories; its renames are not fsync-able this way
+    try:
+        os.fsync(fd)
+    except OSError as e:
+        if e.errno not in (errno.EINVAL, errno.EBADF):
+            raise
+    finally:
+        os.close(fd)
+
+def move_file(src, dst, link_src=None):
+    """Rename src to dst (or hardlink link_src there), copying across filesystems; returns bytes copied"""
+    try:
+        if link_src is None:
+            os.rename(src, dst)
+        else:
+            os.link(link_src, dst)
+            os.unlink(src)
+        return 0
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+
+    # Different filesystem: a hardlink cannot cross it either, so copy the kept file's data
+    copied = _copy_file(link_src or src, dst)
+    os.unlink(src)
+    return copied
+
+def _move_batch(batch):
+    """Move one batch of files, returning (source, target, category, error, bytes copied) per file"""
+    results = []
+    for src, dst, category, link_src in batch:
+        try:
+            copied = move_file(src, dst, link_src)
+            results.append((src, dst, category, None, copied))
+        except Exception as e:
+            results.append((src, dst, category, e, 0))
+    return results
+
+def execute_moves(plan, workers=1):
+    """Run the move plan, serially or through a bounded thread pool"""
+    # Hardlinks point at sources that later moves rename, so they run first
+    links = [step for step in plan if step[3] is not None]
+    if links:
+        yield from _move_batch(links)
+        plan = [step for step in plan if step[3] is None]
+
+    if workers <= 1:
+        yield from _move_batch(plan)
         return
-    
-    # Counters
-    moved = 0
-    errors = 0
-    
-    for item in directory.iterdir():
-        if item.is_file():
-            ext = item.suffix
-            category = get_category(ext)
-            
-            # Create category folder
-            category_dir = directory / category
-            category_dir.mkdir(exist_ok=True)
-            
-            # Move file
+
+    batches = [plan[i:i + MOVE_BATCH_SIZE] for i in range(0, len(plan), MOVE_BATCH_SIZE)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for results in pool.map(_move_batch, batches):
+            yield from results
+
+def _write_wal(directory, plan):
+    """Durably record the plan about to be applied"""
+    with open(directory / PLAN_WAL_NAME, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerows((os.path.abspath(src), os.path.abspath(dst),
+                                 os.path.abspath(link_src) if link_src else '')
+                                for src, dst, _, link_src in plan)
+        f.flush()
+        os.fsync(f.fileno())
+
+def recover_interrupted(directory):
+    """Finish the moves of a run that crashed mid-plan (roll forward from the WAL)"""
+    wal = Path(directory) / PLAN_WAL_NAME
+    if not wal.exists():
+        return
+
+    with open(wal, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    targets = {src: dst for src, dst, _ in rows}
+
+    finished = 0
+    for src, dst, link_src in rows:
+        if not os.path.exists(src) or os.path.exists(dst):
+            continue
+        try:
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            if link_src and not os.path.exists(link_src):
+                # The kept copy may already have been moved to its own target
+                link_src = targets[link_src]
+            move_file(src, dst, link_src or None)
+            finished += 1
+        except Exception as e:
+            print(f"✗ Error recovering {os.path.basename(src)}: {e}")
+
+    wal.unlink()
+    print(f"🩹 Recovered interrupted run: finished {finished} of {len(rows)} moves")
+
+class PlanApplier:
+    """Applies move plans behind a write-ahead record, with buffered output and per-category stats"""
+
+    def __init__(self, directory, workers=1, journal=None, verbose=False, output=None, sniffer=None):
+        self.directory = Path(directory)
+        self.output = Path(output) if output else self.directory
+        self.workers = workers
+        self.journal = journal
+        self.sniffer = sniffer
+        self.verbose = verbose
+        self.created = set()
+        self.stats = defaultdict(lambda: [0, 0])  # category -> [moved, errors]
+        self.copied = 0   # bytes copied across filesystems
+        self.busy = 0.0   # seconds spent applying plans
+
+    def apply(self, plan):
+        """Create missing category folders once, then run the plan in one pass"""
+        if not plan:
+            return
+        start = time.perf_counter()
+        for category in {step[2] for step in plan} - self.created:
+            (self.output / category).mkdir(parents=True, exist_ok=True)
+            self.created.add(category)
+
+        _write_wal(self.directory, plan)
+
+        lines = []
+        done = []
+        links = {step[0]: step[3] for step in plan if step[3] is not None}
+        for src, dst, category, error, copied in execute_moves(plan, self.workers):
+            if error is None:
+                self.stats[category][0] += 1
+                self.copied += copied
+                done.append((src, dst, links.get(src)))
+                if self.verbose:
+                    lines.append(f"✓ {os.path.basename(src)} → {category}/")
+            else:
+                self.stats[category][1] += 1
+                lines.append(f"✗ Error moving {os.path.basename(src)}: {error}")
+        if lines:
+            sys.stdout.write('\n'.join(lines) + '\n')
+
+        if self.journal:
+            self.journal.record(done)
+        if self.sniffer:
+            self.sniffer.forget(src for src, _, _ in done)
+        (self.directory / PLAN_WAL_NAME).unlink()
+        self.busy += time.perf_counter() - start
+
+    def close(self):
+        pass
+
+class PlanWriter:
+    """Dry run: writes the plan as JSON or CSV rows instead of moving anything"""
+
+    FIELDS = ('source', 'target', 'category', 'link_source')
+
+    def __init__(self, out, fmt='json'):
+        self.out = out
+        self.fmt = fmt
+        self.stats = defaultdict(lambda: [0, 0])
+        self._rows = 0
+        if fmt == 'csv':
+            self._csv = csv.writer(out)
+            self._csv.writerow(self.FIELDS)
+        else:
+            out.write('[')
+
+    def apply(self, plan):
+        for step in plan:
+            self.stats[step[2]][0] += 1
+        if self.fmt == 'csv':
+            self._csv.writerows((src, dst, category, link_src or '')
+                                for src, dst, category, link_src in plan)
+            return
+        for step in plan:
+            self.out.write((',\n ' if self._rows else '\n ') + json.dumps(dict(zip(self.FIELDS, step))))
+            self._rows += 1
+
+    def close(self):
+        if self.fmt == 'json':
+            self.out.write('\n]\n')
+        self.out.flush()
+
+def print_summary(stats, file=None):
+    """Per-category table of moved files and errors"""
+    for category in sorted(stats):
+        moved, errors = stats[category]
+        print(f"   {category:<12} {moved:>9,}" + (f"  ({errors} errors)" if errors else ""), file=file)
+
+class Journal:
+    """SQLite journal of runs: the directory mtime, leftover entries and every move"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value INTEGER);
+        CREATE TABLE IF NOT EXISTS seen (name TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER);
+        CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, started REAL);
+        CREATE TABLE IF NOT EXISTS moves (run_id INTEGER, src TEXT, dst TEXT, link_src TEXT);
+        CREATE INDEX IF NOT EXISTS moves_run ON moves (run_id);
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.db = sqlite3.connect(directory / JOURNAL_NAME)
+        # Keep the rollback journal file around so commits do not touch the directory mtime
+        self.db.execute('PRAGMA journal_mode=PERSIST')
+        self.db.executescript(self.SCHEMA)
+        # Journals written before hardlink steps were recorded lack the column
+        if 'link_src' not in {row[1] for row in self.db.execute('PRAGMA table_info(moves)')}:
+            self.db.execute('ALTER TABLE moves ADD COLUMN link_src TEXT')
+        self.run_id = None
+
+    def close(self):
+        self.db.close()
+
+    def unchanged(self):
+        """True if the directory has not changed since the last finished run"""
+        row = self.db.execute("SELECT value FROM state WHERE key = 'mtime_ns'").fetchone()
+        return row is not None and row[0] == os.stat(self.directory).st_mtime_ns
+
+    def new_entries(self, entries):
+        """Drop entries a previous run already looked at and left unchanged"""
+        seen = dict(((name, (size, mtime)) for name, size, mtime
+                     in self.db.execute('SELECT name, size, mtime_ns FROM seen')))
+        if not seen:
+            return entries
+        fresh = []
+        for entry in entries:
+            known = seen.get(entry.name)
+            if known is None:
+                fresh.append(entry)
+                continue
+            st = entry.stat()
+            if known != (st.st_size, st.st_mtime_ns):
+                fresh.append(entry)
+        return fresh
+
+    def start_run(self):
+        self.run_id = self.db.execute('INSERT INTO runs (started) VALUES (?)', (time.time(),)).lastrowid
+        self.db.commit()
+
+    def record(self, moves):
+        """Append finished moves [(src, dst, link_src)] of the current run"""
+        self.db.executemany('INSERT INTO moves (run_id, src, dst, link_src) VALUES (?, ?, ?, ?)',
+                            ((self.run_id, os.path.abspath(src), os.path.abspath(dst), link_src)
+                             for src, dst, link_src in moves))
+        self.db.commit()
+
+    def finish(self):
+        """Remember leftover entries and the directory mtime for the next run"""
+        leftovers = [(e.name, e.stat().st_size, e.stat().st_mtime_ns) for e in scan_files(self.directory)]
+        self.db.execute('DELETE FROM seen')
+        self.db.executemany('INSERT INTO seen VALUES (?, ?, ?)', leftovers)
+        self.db.commit()
+        mtime = os.stat(self.directory).st_mtime_ns
+        self.db.execute("INSERT OR REPLACE INTO state VALUES ('mtime_ns', ?)", (mtime,))
+        self.db.commit()
+
+    def undo(self):
+        """Move files of the last run back, newest first; returns (restored, errors)"""
+        row = self.db.execute('SELECT MAX(id) FROM runs').fetchone()
+        if row[0] is None:
+            return 0, 0
+
+        restored = 0
+        errors = 0
+        names = NameIndex()
+        moves = self.db.execute('SELECT src, dst, link_src FROM moves WHERE run_id = ? ORDER BY rowid DESC',
+                                (row[0],)).fetchall()
+        for src, dst, link_src in moves:
             try:
-                new_path = category_dir / item.name
-                # Handle name conflicts
-                if new_path.exists():
-                    base = item.stem
-                    counter = 1
-                    while new_path.exists():
-                        new_path = category_dir / f"{base}_{counter}{ext}"
-                        counter += 1
-                
-                item.rename(new_path)
-                print(f"✓ {item.name} → {category}/")
-                moved += 1
+                target = src
+                if os.path.lexists(src):
+                    # A new file took the old name since the run; never overwrite it
+                    target = names.claim(os.path.dirname(src), os.path.basename(src))
+                if link_src:
+                    # dst is a hardlink to the kept copy: restore an independent file
+                    _copy_file(dst, target)
+                    os.unlink(dst)
+                else:
+                    move_file(dst, target)
+                if target != src:
+                    print(f"✗ {src} exists, restored {Path(dst).name} as {target}")
+                    errors += 1
+                    continue
+                print(f"↩ {Path(dst).name} → {src}")
+                restored += 1
             except Exception as e:
-                print(f"✗ Error moving {item.name}: {e}")
+                print(f"✗ Error restoring {dst}: {e}")
                 errors += 1
-    
-    print(f"\n✅ Done! Moved {moved} files" + (f", {errors} errors" if errors else ""))
+
+        self.db.execute('DELETE FROM moves WHERE run_id = ?', (row[0],))
+        self.db.execute('DELETE FROM runs WHERE id = ?', (row[0],))
+        # Force a full rescan next time
+        self.db.execute("DELETE FROM state WHERE key = 'mtime_ns'")
+        self.db.commit()
+        return restored, errors
+
+def undo_last_run(directory):
+    """Revert the last journaled run in directory"""
+    directory = Path(directory)
+    if not (directory / JOURNAL_NAME).exists():
+        print(f"Error: No journal in '{directory}'")
+        return
+
+    journal = Journal(directory)
+    try:
+        restored, errors = journal.undo()
+    finally:
+        journal.close()
+    print(f"\n✅ Undone! Restored {restored} files" + (f", {errors} errors" if errors else ""))
+
+class InotifyWatcher:
+    """Linux inotify through ctypes; reports files that were closed after writing or moved in"""
+
+    def __init__(self, directory):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, f'inotify_add_watch failed for {directory}')
+        self.overflowed = False
+
+    def read(self, timeout):
+        """Wait up to timeout seconds and return the file names that finished"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+
+        data = os.read(self.fd, 64 * 1024)
+        names = []
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = _INOTIFY_EVENT.unpack_from(data, offset)
+            offset += _INOTIFY_EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                self.overflowed = True
+            elif name and not mask & IN_ISDIR:
+                names.append(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    """Fallback watcher: rescans periodically and reports files whose size and mtime held still"""
+
+    def __init__(self, directory, interval=WATCH_POLL_INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        self.overflowed = False
+        self._last = {}      # name -> (size, mtime_ns) from the previous scan
+        self._reported = {}  # name -> signature already reported
+
+    def read(self, timeout):
+        time.sleep(max(timeout, self.interval))
+        current = {}
+        for entry in scan_files(self.directory):
+            st = entry.stat()
+            current[entry.name] = (st.st_size, st.st_mtime_ns)
+
+        # Report each file once, after its size and mtime survived a whole interval
+        stable = [name for name, sig in current.items()
+                  if self._last.get(name) == sig and self._reported.get(name) != sig]
+        self._reported = {name: sig for name, sig in current.items()
+                          if self._reported.get(name) == sig or name in stable}
+        self._last = current
+        return stable
+
+    def close(self):
+        pass
+
+def open_watcher(directory):
+    """Use inotify on Linux, polling everywhere else"""
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(directory)
+        except (OSError, AttributeError) as e:
+            print(f"⚠️ inotify unavailable ({e}), falling back to polling")
+    return PollingWatcher(directory)
+
+def _plan_watch_batch(directory, root, names, index):
+    """Plan moves for a micro-batch, re-checking targets other programs may have created"""
+    plan = []
+    for name in names:
+        path = os.path.join(directory, name)
+        if not os.path.isfile(path):
+            continue
+        category = get_category(split_ext(name)[1])
+        new_path = index.claim(root / category, name)
+        while os.path.exists(new_path):
+            new_path = index.claim(root / category, name)
+        plan.append((path, new_path, category, None))
+    return plan
+
+def watch_directory(directory, workers=1, output=None):
+    """Organize new files as they arrive, in debounced micro-batches"""
+    directory = Path(directory)
+    root = Path(output) if output else directory
+
+    if not directory.exists():
+        print(f"Error: Directory '{directory}' does not exist")
+        return
+
+    recover_interrupted(directory)
+    skip = set(FILE_TYPES) | {'Others', DUPLICATES_DIR}
+    watcher = open_watcher(directory)
+    index = NameIndex()
+    applier = PlanApplier(directory, workers, verbose=True, output=root)
+
+    # name -> (first event, last event), monotonic seconds
+    pending = {}
+    now = time.monotonic()
+    # Files already there may still be open in a writer: like PollingWatcher, they are
+    # only queued once their size and mtime held still for a whole poll interval
+    settling = {}
+    for entry in scan_files(directory):
+        st = entry.stat()
+        settling[entry.name] = (st.st_size, st.st_mtime_ns)
+    settle_at = now + WATCH_POLL_INTERVAL
+
+    latencies = []  # event→move seconds since the last stats line
+    last_stats = now
+    kind = 'inotify' if isinstance(watcher, InotifyWatcher) else 'polling'
+    print(f"👀 Watching {directory} ({kind})... Press Ctrl+C to stop")
+
+    def print_stats():
+        avg = sum(latencies) / len(latencies) if latencies else 0
+        worst = max(latencies) if latencies else 0
+        moved = sum(m for m, _ in applier.stats.values())
+        print(f"📈 queue {len(pending)}, moved {moved}, "
+              f"event→move latency avg {avg:.2f}s max {worst:.2f}s")
+
+    try:
+        while True:
+            names = watcher.read(WATCH_DEBOUNCE)
+            now = time.monotonic()
+            if watcher.overflowed:
+                # Kernel queue overflowed: fall back to a full scan once
+                watcher.overflowed = False
+                names = [entry.name for entry in scan_files(directory)]
+            for name in names:
+                settling.pop(name, None)
+
+            if settling and now >= settle_at:
+                unsettled = {}
+                for name, sig in settling.items():
+                    try:
+                        st = os.stat(directory / name)
+                    except OSError:
+                        continue
+                    if (st.st_size, st.st_mtime_ns) == sig:
+                        names.append(name)
+                    else:
+                        unsettled[name] = (st.st_size, st.st_mtime_ns)
+                settling = unsettled
+                settle_at = now + WATCH_POLL_INTERVAL
+
+            for name in names:
+                if name in skip or name.startswith(STATE_PREFIX) or name.endswith(TEMP_SUFFIXES):
+                    continue
+                first = pending.get(name, (now, now))[0]
+                pending[name] = (first, now)
+
+            ready = [name for name, (_, last) in pending.items() if now - last >= WATCH_DEBOUNCE]
+            ready = ready[:WATCH_BATCH_SIZE]
+            if ready:
+                firsts = {name: pending.pop(name)[0] for name in ready}
+                applier.apply(_plan_watch_batch(directory, root, ready, index))
+                done = time.monotonic()
+                latencies.extend(done - first for first in firsts.values())
+
+            if now - last_stats >= WATCH_STATS_INTERVAL:
+                print_stats()
+                latencies.clear()
+                last_stats = now
+    except KeyboardInterrupt:
+        print_stats()
+        print("\n👋 Stopped")
+    finally:
+        watcher.close()
+
+def organize_tree(directory, root, applier, sniffer=None):
+    """Organize every file under directory into root, streaming the walk in chunks"""
+    skip = set(FILE_TYPES) | {'Others', DUPLICATES_DIR}
+    if root != directory:
+        # Category folders live elsewhere; only an output root inside the tree needs skipping
+        skip = {root.name} if root.resolve().parent == directory.resolve() else set()
+    names = NameIndex()
+
+    for chunk in chunked(stream(walk_files(directory, skip)), WALK_CHUNK_SIZE):
+        sniffed = sniffer.classify(chunk) if sniffer else None
+        applier.apply(plan_moves(root, chunk, names, sniffed))
+
+def organize_files(directory, workers=1, dedupe=None, recursive=False, use_journal=False,
+                   sniff=False, verbose=False, plan_out=None, plan_format='json', output=None):
+    """Organize files in directory by type; with plan_out, only write the plan (dry run)
+
+    Category folders are created under output when given, which may be another filesystem.
+    """
+    directory = Path(directory)
+    root = Path(output) if output else directory
+
+    if not directory.exists():
+        print(f"Error: Directory '{directory}' does not exist")
+        return
+
+    start = time.perf_counter()
+    duplicates = None
+    dry_run = plan_out is not None
+    # Keep the summary out of a plan written to stdout
+    report = sys.stderr if plan_out is sys.stdout else sys.stdout
+
+    if not dry_run:
+        recover_interrupted(directory)
+    journal = Journal(directory) if use_journal and not dry_run else None
+
+    # Subfolders can change without touching the top-level mtime
+    if journal and not recursive and journal.unchanged():
+        journal.close()
+        print("💤 No changes since last run")
+        return
+
+    if journal:
+        journal.start_run()
+    sniffer = Sniffer(directory, workers, readonly=dry_run) if sniff else None
+    if dry_run:
+        applier = PlanWriter(plan_out, plan_format)
+    else:
+        applier = PlanApplier(directory, workers, journal, verbose, root, sniffer)
+
+    if recursive:
+        organize_tree(directory, root, applier, sniffer)
+    else:
+        entries = scan_files(directory)
+        if journal:
+            entries = journal.new_entries(entries)
+        sniffed = sniffer.classify(entries) if sniffer else None
+
+        if not dedupe:
+            applier.apply(plan_moves(root, entries, sniffed=sniffed))
+        else:
+            names = NameIndex()
+            unique, candidates = split_by_size(entries)
+            # Hash same-size files in other processes while unique sizes are moved
+            with ProcessPoolExecutor() as hashers, ThreadPoolExecutor(max_workers=1) as driver:
+                job = driver.submit(find_duplicates, candidates, hashers)
+                applier.apply(plan_moves(root, unique, names, sniffed))
+                duplicates = job.result()
+
+            applier.apply(plan_dedupe(root, candidates, duplicates, dedupe, names, sniffed))
+
+    applier.close()
+    if sniffer:
+        sniffer.close()
+    if journal:
+        journal.finish()
+        journal.close()
+
+    elapsed = time.perf_counter() - start
+    moved = sum(m for m, _ in applier.stats.values())
+    errors = sum(e for _, e in applier.stats.values())
+    rate = moved / elapsed if elapsed > 0 else 0
+
+    if dry_run:
+        print(f"\n📝 Dry run: planned {moved} moves", file=report)
+    else:
+        print(f"\n✅ Done! Moved {moved} files" + (f", {errors} errors" if errors else ""), file=report)
+    print_summary(applier.stats, file=report)
+    if duplicates is not None:
+        print(f"🔁 {len(duplicates)} duplicates ({dedupe})", file=report)
+    if getattr(applier, 'copied', 0):
+        mb = applier.copied / 1e6
+        print(f"📦 Copied {mb:,.1f} MB across filesystems ({mb / applier.busy:,.1f} MB/s)", file=report)
+    print(f"⏱  {elapsed:.2f}s ({rate:,.0f} files/sec, {max(workers, 1)} worker(s))", file=report)
+
+def main():
+    parser = argparse.ArgumentParser(description='Organize files by type')
+    parser.add_argument('directory', nargs='?', default='.', help='Directory to organize')
+    parser.add_argument('--workers', type=int, default=1, help='Parallel move threads (1 = serial)')
+    parser.add_argument('--output', '-o',
+                        help='Root for the category folders (default: the directory itself)')
+    parser.add_argument('--dedupe', choices=['skip', 'move', 'hardlink'],
+                        help='Detect identical files: leave them, move to Duplicates/, or hardlink')
+    parser.add_argument('--recursive', '-r', action='store_true',
+                        help='Also organize files in subfolders (streamed walk)')
+    parser.add_argument('--journal', action='store_true',
+                        help=f'Keep {JOURNAL_NAME} so repeat runs only look at new entries')
+    parser.add_argument('--undo', action='store_true', help='Revert the last journaled run and exit')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and organize new files as they arrive')
+    parser.add_argument('--sniff', action='store_true',
+                        help='Classify files with unknown extensions by their first bytes')
+    parser.add_argument('--dry-run', action='store_true', help='Only write the move plan')
+    parser.add_argument('--plan-format', choices=['json', 'csv'], default='json',
+                        help='Dry-run plan format (default: json)')
+    parser.add_argument('--plan-out', default='-', help='Dry-run plan file (default: stdout)')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Print one line per moved file')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='Benchmark extension lookup and content sniffing, then exit')
+
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark_classify()
+        benchmark_sniff()
+        return
+    if args.undo:
+        undo_last_run(args.directory)
+        return
+    if args.watch:
+        unsupported = [flag for flag, value in (('--dedupe', args.dedupe), ('--recursive', args.recursive),
+                                                ('--journal', args.journal), ('--sniff', args.sniff),
+                                                ('--dry-run', args.dry_run)) if value]
+        if unsupported:
+            parser.error(f"{', '.join(unsupported)} cannot be combined with --watch")
+        watch_directory(args.directory, args.workers, args.output)
+        return
+    if args.recursive and args.dedupe:
+        parser.error('--dedupe cannot be combined with --recursive')
+
+    options = dict(workers=args.workers, dedupe=args.dedupe, recursive=args.recursive,
+                   use_journal=args.journal, sniff=args.sniff, verbose=args.verbose,
+                   plan_format=args.plan_format, output=args.output)
+    if not args.dry_run:
+        organize_files(args.directory, **options)
+    elif args.plan_out == '-':
+        organize_files(args.directory, plan_out=sys.stdout, **options)
+    else:
+        with open(args.plan_out, 'w', newline='', encoding='utf-8') as out:
+            organize_files(args.directory, plan_out=out, **options)
 
 if __name__ == '__main__':
-    target_dir = sys.argv[1] if len(sys.argv) > 1 else '.'
-    organize_files(target_dir)
+    main()
@@ -6,73 +6,288 @@ Screenshot Organizer - 自動整理截圖
 
 import os
 import shutil
+import struct
 from datetime import datetime
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 
-def organize_screenshots(screenshots_dir: str, output_dir: str):
+# 只讀取檔頭: JPEG 的 EXIF 區段最多 64 KB
+HEADER_LIMIT = 64 * 1024
+
+# EXIF 標籤
+TAG_EXIF_IFD = 0x8769
+TAG_DATETIME = 0x0132
+TAG_DATETIME_ORIGINAL = 0x9003
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def _parse_exif_datetime(value):
+    """解析 EXIF 日期字串 'YYYY:MM:DD HH:MM:SS'"""
+    try:
+        return datetime.strptime(value.strip('\x00 ')[:19], '%Y:%m:%d %H:%M:%S')
+    except ValueError:
+        return None
+
+
+def parse_tiff_datetime(data):
+    """從 TIFF/EXIF 區塊取出 DateTimeOriginal (沒有時用 DateTime)"""
+    if len(data) < 8 or data[:2] not in (b'II', b'MM'):
+        return None
+    endian = '<' if data[:2] == b'II' else '>'
+
+    def read_ifd(offset):
+        tags = {}
+        if offset + 2 > len(data):
+            return tags
+        count = struct.unpack_from(endian + 'H', data, offset)[0]
+        for i in range(count):
+            entry = offset + 2 + i * 12
+            if entry + 12 > len(data):
+                break
+            tag, typ, n, value = struct.unpack_from(endian + 'HHII', data, entry)
+            if tag == TAG_EXIF_IFD:
+                tags[tag] = value
+            elif tag in (TAG_DATETIME, TAG_DATETIME_ORIGINAL) and typ == 2:
+                # ASCII 超過 4 bytes 時 value 是偏移量
+                raw = data[value:value + n] if n > 4 else data[entry + 8:entry + 8 + n]
+                tags[tag] = raw.decode('ascii', 'replace')
+        return tags
+
+    ifd0 = read_ifd(struct.unpack_from(endian + 'I', data, 4)[0])
+    exif = read_ifd(ifd0[TAG_EXIF_IFD]) if TAG_EXIF_IFD in ifd0 else {}
+    for value in (exif.get(TAG_DATETIME_ORIGINAL), ifd0.get(TAG_DATETIME)):
+        if value:
+            dt = _parse_exif_datetime(value)
+            if dt:
+                return dt
+    return None
+
+
+def _png_capture_time(f):
+    """逐一讀取 PNG chunk 標頭，跳過影像資料，找 eXIf / tIME / tEXt"""
+    f.seek(8)
+    found = None
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            return found
+        length, kind = struct.unpack('>I4s', header)
+        if kind == b'IEND':
+            return found
+        if kind == b'eXIf' and length <= HEADER_LIMIT:
+            dt = parse_tiff_datetime(f.read(length))
+            if dt:
+                return dt
+            f.seek(4, os.SEEK_CUR)
+            continue
+        if kind == b'tIME' and length == 7 and found is None:
+            y, mo, d, h, mi, s = struct.unpack('>HBBBBB', f.read(7))
+            try:
+                found = datetime(y, mo, d, h, mi, s)
+            except ValueError:
+                pass
+            f.seek(4, os.SEEK_CUR)
+            continue
+        if kind == b'tEXt' and length <= 1024:
+            key, _, text = f.read(length).partition(b'\x00')
+            if key == b'Creation Time':
+                dt = _parse_text_datetime(text.decode('latin-1'))
+                if dt:
+                    return dt
+            f.seek(4, os.SEEK_CUR)
+            continue
+        # 跳過資料與 CRC，不解碼影像
+        f.seek(length + 4, os.SEEK_CUR)
+
+
+def _parse_text_datetime(text):
+    """解析 PNG tEXt 'Creation Time' 常見格式"""
+    text = text.strip()
+    for fmt in ('%Y:%m:%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S',
+                '%a, %d %b %Y %H:%M:%S %z', '%a %b %d %H:%M:%S %Y'):
+        # ISO 格式可能帶時區或毫秒，只取前 19 個字元
+        for candidate in (text, text[:19]):
+            try:
+                return datetime.strptime(candidate, fmt).replace(tzinfo=None)
+            except ValueError:
+                continue
+    return None
+
+
+def _jpeg_capture_time(f):
+    """逐一讀取 JPEG marker，直到 APP1 Exif 或影像資料開始"""
+    f.seek(2)
+    while True:
+        marker = f.read(4)
+        if len(marker) < 4 or marker[0] != 0xFF:
+            return None
+        kind, length = marker[1], struct.unpack('>H', marker[2:])[0]
+        if kind == 0xDA:  # SOS: 之後是影像資料
+            return None
+        if kind == 0xE1:
+            segment = f.read(length - 2)
+            if segment.startswith(b'Exif\x00\x00'):
+                return parse_tiff_datetime(segment[6:])
+            continue
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def _webp_capture_time(f):
+    """讀取 WebP RIFF chunk，找 EXIF"""
+    f.seek(12)
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            return None
+        kind, length = struct.unpack('<4sI', header)
+        if kind == b'EXIF' and length <= HEADER_LIMIT:
+            data = f.read(length)
+            if data.startswith(b'Exif\x00\x00'):
+                data = data[6:]
+            return parse_tiff_datetime(data)
+        f.seek(length + (length & 1), os.SEEK_CUR)
+
+
+def read_capture_time(path):
+    """只讀檔頭取得截圖時間 (EXIF DateTimeOriginal / PNG tIME、tEXt)，找不到回傳 None"""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(12)
+            if head.startswith(PNG_SIGNATURE):
+                return _png_capture_time(f)
+            if head.startswith(b'\xff\xd8'):
+                return _jpeg_capture_time(f)
+            if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+                return _webp_capture_time(f)
+    except (OSError, struct.error):
+        pass
+    return None
+
+
+def lookup_capture_times(files, workers=8):
+    """
+    平行讀取截圖時間
+
+    Args:
+        files: [Path]
+    Returns:
+        {Path: datetime 或 None}
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(files, pool.map(read_capture_time, files)))
+
+
+def organize_screenshots(screenshots_dir: str, output_dir: str, use_metadata: bool = False,
+                         workers: int = 8, group_similar: bool = False, thumbnails: bool = False,
+                         index_text: bool = False):
     """
     將截圖按日期整理到不同資料夾
-    
+
     Args:
         screenshots_dir: 截圖所在資料夾 (e.g., ~/Desktop)
         output_dir: 輸出資料夾 (e.g., ~/Pictures/Screenshots)
+        use_metadata: 優先使用 EXIF / PNG 中繼資料的截圖時間，而非修改時間
+        workers: 讀取中繼資料的執行緒數
+        group_similar: 整理後把每個日期資料夾中相似的截圖歸到子資料夾
+        thumbnails: 整理後為每個日期資料夾產生縮圖與總覽圖
+        index_text: 整理後用 OCR 更新輸出資料夾的文字索引 (screenshot_search.py)
     """
     screenshots_path = Path(screenshots_dir).expanduser()
     output_path = Path(output_dir).expanduser()
-    
+
     # 支援的圖片格式
     image_extensions = {'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp'}
-    
+
     # 常見截圖檔名模式
     screenshot_patterns = ['screenshot', 'screen shot', '截圖', 'capture', 'snip', 'shot']
-    
+
+    today = datetime.now().date()
+    screenshots = []
+
+    with os.scandir(screenshots_path) as entries:
+        files = [entry for entry in entries if entry.is_file()]
+
+    for entry in files:
+        file = Path(entry.path)
+        # 檢查副檔名
+        if file.suffix.lower() not in image_extensions:
+            continue
+
+        # 只 stat 一次
+        st = entry.stat()
+
+        # 檢查是否為截圖（檔名包含相關關鍵詞或 modification time）
+        filename_lower = file.name.lower()
+        is_screenshot = any(pattern in filename_lower for pattern in screenshot_patterns)
+
+        # 也檢查檔案修改時間（今天的也當作截圖）
+        if not is_screenshot:
+            if datetime.fromtimestamp(st.st_mtime).date() == today:
+                is_screenshot = True
+
+        if is_screenshot:
+            screenshots.append((file, st))
+
+    captured = {}
+    if use_metadata and screenshots:
+        captured = lookup_capture_times([file for file, _ in screenshots], workers)
+
     organized_count = 0
-    
-    for file in screenshots_path.iterdir():
-        if file.is_file():
-            # 檢查副檔名
-            if file.suffix.lower() not in image_extensions:
-                continue
-            
-            # 檢查是否為截圖（檔名包含相關關鍵詞或 modification time）
-            filename_lower = file.name.lower()
-            is_screenshot = any(pattern in filename_lower for pattern in screenshot_patterns)
-            
-            # 也檢查檔案修改時間（今天的也當作截圖）
-            if not is_screenshot:
-                # 嘗試獲取檔案時間
-                mtime = datetime.fromtimestamp(file.stat().st_mtime)
-                if mtime.date() == datetime.now().date():
-                    is_screenshot = True
-            
-            if is_screenshot:
-                # 獲取日期
-                mtime = datetime.fromtimestamp(file.stat().st_mtime)
-                date_folder = mtime.strftime("%Y-%m-%d")
-                
-                # 建立日期資料夾
-                target_folder = output_path / date_folder
-                target_folder.mkdir(parents=True, exist_ok=True)
-                
-                # 移動檔案
-                target_path = target_folder / file.name
-                shutil.move(str(file), str(target_path))
-                
-                print(f"📁 {file.name} → {date_folder}/")
-                organized_count += 1
-    
+    date_folders = set()
+
+    for file, st in screenshots:
+        # 獲取日期：中繼資料優先，否則用修改時間
+        taken = captured.get(file) or datetime.fromtimestamp(st.st_mtime)
+        date_folder = taken.strftime("%Y-%m-%d")
+
+        # 建立日期資料夾
+        target_folder = output_path / date_folder
+        target_folder.mkdir(parents=True, exist_ok=True)
+        date_folders.add(target_folder)
+
+        # 移動檔案
+        target_path = target_folder / file.name
+        shutil.move(str(file), str(target_path))
+
+        print(f"📁 {file.name} → {date_folder}/")
+        organized_count += 1
+
+    if group_similar:
+        from similar_screenshots import group_similar as group_folder
+        for folder in sorted(date_folders):
+            group_folder(folder)
+
+    if thumbnails and date_folders:
+        from screenshot_thumbnails import build_all
+        build_all(sorted(date_folders))
+
+    if index_text and date_folders:
+        from screenshot_search import index_screenshots
+        index_screenshots(output_path)
+
     print(f"\n✅ 完成！已整理 {organized_count} 個檔案")
     return organized_count
 
 
 if __name__ == "__main__":
     import argparse
-    
+
     parser = argparse.ArgumentParser(description="自動整理截圖")
     parser.add_argument("--input", "-i", default="~/Desktop", help="截圖資料夾")
     parser.add_argument("--output", "-o", default="~/Pictures/Screenshots", help="輸出資料夾")
-    
+    parser.add_argument("--metadata", "-m", action="store_true",
+                        help="用 EXIF / PNG 中繼資料的截圖時間分類")
+    parser.add_argument("--workers", "-w", type=int, default=8, help="讀取中繼資料的執行緒數")
+    parser.add_argument("--similar", "-s", action="store_true",
+                        help="把相似截圖歸到子資料夾 (需要 Pillow、NumPy)")
+    parser.add_argument("--thumbnails", "-t", action="store_true",
+                        help="為日期資料夾產生縮圖與總覽圖 (需要 Pillow)")
+    parser.add_argument("--ocr", action="store_true",
+                        help="辨識截圖文字並更新搜尋索引 (需要 tesseract)")
+
     args = parser.parse_args()
-    
-    organize_screenshots(args.input, args.output)
+
+    organize_screenshots(args.input, args.output, args.metadata, args.workers, args.similar,
+                         args.thumbnails, args.ocr)
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Screenshot Search - 截圖文字索引與全文搜尋
+
+用 tesseract 辨識整理好的截圖中的文字，存進輸出資料夾內的
+SQLite FTS5 索引 (.screenshot_text.db)。文字以檔案內容雜湊為鍵，
+重新執行時只辨識新增或修改過的檔案，搬移或重複的截圖不會重做 OCR。
+
+Usage:
+    python3 screenshot_search.py index ~/Pictures/Screenshots
+    python3 screenshot_search.py search "invoice 2026" -r ~/Pictures/Screenshots
+
+Requirements:
+    - Python 3.6+
+    - tesseract (brew install tesseract / apt install tesseract-ocr)
+"""
+
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import hashlib
+import argparse
+import subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+
+# 索引資料庫 (存放在輸出資料夾)
+INDEX_NAME = '.screenshot_text.db'
+
+# tesseract 語言，多個用 + 連接
+DEFAULT_LANG = 'eng'
+
+# 同時執行的 tesseract 行程數
+DEFAULT_WORKERS = os.cpu_count() or 4
+
+OCR_TIMEOUT = 120
+HASH_CHUNK = 1024 * 1024
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp'}
+
+# 不索引的子資料夾 (縮圖)
+SKIP_DIRS = {'_thumbs'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    key  TEXT NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_hash ON files(hash);
+CREATE VIRTUAL TABLE IF NOT EXISTS texts USING fts5(
+    hash UNINDEXED,
+    body,
+    tokenize = 'unicode61'
+);
+"""
+
+
+def open_index(root):
+    """開啟 (必要時建立) 索引資料庫"""
+    db = sqlite3.connect(str(Path(root) / INDEX_NAME))
+    db.execute('PRAGMA journal_mode=WAL')
+    db.executescript(SCHEMA)
+    return db
+
+
+def _index_key(st):
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def file_hash(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def ocr_image(path, lang=DEFAULT_LANG):
+    """用 tesseract 辨識圖片文字；失敗回傳 None"""
+    try:
+        result = subprocess.run(['tesseract', str(path), 'stdout', '-l', lang],
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                timeout=OCR_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    return ' '.join(result.stdout.decode('utf-8', 'replace').split())
+
+
+def scan_images(root):
+    """遞迴列出根目錄下的圖片；回傳 {相對路徑: stat 鍵}"""
+    found = {}
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    if entry.name not in SKIP_DIRS and not entry.name.startswith('.'):
+                        stack.append(entry.path)
+                elif entry.is_file() and Path(entry.name).suffix.lower() in IMAGE_EXTENSIONS:
+                    found[os.path.relpath(entry.path, root)] = _index_key(entry.stat())
+    return found
+
+
+def index_screenshots(root, workers=DEFAULT_WORKERS, lang=DEFAULT_LANG):
+    """
+    增量更新文字索引
+
+    Returns:
+        (新辨識的圖片數, 目前索引中的檔案數)
+    """
+    root = Path(root).expanduser()
+    if shutil.which('tesseract') is None:
+        print("❌ 找不到 tesseract，請先安裝 (brew install tesseract / apt install tesseract-ocr)")
+        return 0, 0
+
+    db = open_index(root)
+    known = {path: key for path, key in db.execute('SELECT path, key FROM files')}
+    current = scan_images(root)
+
+    # 移除已不存在的檔案
+    gone = [(path,) for path in known if path not in current]
+    db.executemany('DELETE FROM files WHERE path = ?', gone)
+
+    changed = [path for path, key in current.items() if known.get(path) != key]
+    indexed = {row[0] for row in db.execute('SELECT hash FROM texts')}
+
+    def process(path):
+        full = root / path
+        try:
+            digest = file_hash(full)
+        except OSError:
+            return path, None, None
+        # 相同內容已辨識過就不再執行 OCR
+        text = None if digest in indexed else ocr_image(full, lang)
+        return path, digest, text
+
+    recognized = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for done, (path, digest, text) in enumerate(pool.map(process, changed), 1):
+            if digest is None:
+                continue
+            if digest not in indexed:
+                # OCR 失敗的檔案不記錄，下次再試
+                if text is None:
+                    print(f"⚠️ 無法辨識 {path}")
+                    continue
+                db.execute('INSERT INTO texts (hash, body) VALUES (?, ?)', (digest, text))
+                indexed.add(digest)
+                recognized += 1
+                print(f"🔤 {path}")
+            db.execute('INSERT OR REPLACE INTO files (path, key, hash) VALUES (?, ?, ?)',
+                       (path, current[path], digest))
+            # 定期提交，中斷時已辨識的結果不會遺失
+            if done % 50 == 0:
+                db.commit()
+
+    # 清掉沒有任何檔案對應的文字
+    db.execute('DELETE FROM texts WHERE hash NOT IN (SELECT hash FROM files)')
+    db.commit()
+    total = db.execute('SELECT COUNT(*) FROM files').fetchone()[0]
+    db.close()
+    return recognized, total
+
+
+def _fts_query(text):
+    """把使用者輸入轉成 FTS5 查詢：每個詞加引號，全部都要出現"""
+    terms = text.split()
+    return ' '.join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def search_screenshots(root, query, limit=20):
+    """
+    全文搜尋截圖，依相關度 (bm25) 排序
+
+    Returns:
+        [(相對路徑, 片段)]
+    """
+    root = Path(root).expanduser()
+    if not (root / INDEX_NAME).exists():
+        return []
+    match = _fts_query(query)
+    if not match:
+        return []
+
+    db = open_index(root)
+    rows = db.execute("""
+        SELECT files.path, snippet(texts, 1, '[', ']', '…', 12)
+        FROM texts JOIN files ON files.hash = texts.hash
+        WHERE texts MATCH ?
+        ORDER BY bm25(texts), files.path
+        LIMIT ?
+    """, (match, limit)).fetchall()
+    db.close()
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="截圖文字索引與搜尋")
+    sub = parser.add_subparsers(dest="command")
+    sub.required = True
+
+    p_index = sub.add_parser("index", help="辨識新截圖並更新索引")
+    p_index.add_argument("root", nargs="?", default="~/Pictures/Screenshots", help="截圖輸出資料夾")
+    p_index.add_argument("--workers", "-w", type=int, default=DEFAULT_WORKERS,
+                         help=f"同時執行的 tesseract 數 (預設: {DEFAULT_WORKERS})")
+    p_index.add_argument("--lang", "-l", default=DEFAULT_LANG, help="tesseract 語言，例如 eng+chi_tra")
+
+    p_search = sub.add_parser("search", help="搜尋截圖中的文字")
+    p_search.add_argument("query", help="搜尋字詞")
+    p_search.add_argument("--root", "-r", default="~/Pictures/Screenshots", help="截圖輸出資料夾")
+    p_search.add_argument("--limit", "-n", type=int, default=20, help="最多顯示幾筆 (預設: 20)")
+
+    args = parser.parse_args()
+
+    if args.command == "index":
+        recognized, total = index_screenshots(args.root, args.workers, args.lang)
+        print(f"\n✅ 完成！新辨識 {recognized} 張，索引共 {total} 個檔案")
+        sys.exit(0)
+
+    start = time.perf_counter()
+    results = search_screenshots(args.root, args.query, args.limit)
+    elapsed = (time.perf_counter() - start) * 1000
+    for path, snippet in results:
+        print(f"🔍 {path}\n   {snippet}")
+    print(f"\n{len(results)} 筆結果 ({elapsed:.1f} ms)")
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Screenshot Thumbnails - 為日期資料夾產生縮圖與總覽圖 (contact sheet)
+
+在 screenshot_organizer.py 整理好的 YYYY-MM-DD 資料夾中，產生
+_thumbs/ 縮圖與 _thumbs/contact_sheet_001.jpg 等總覽圖 (每張最多
+--per-sheet 張縮圖)，透過網路磁碟瀏覽時不必載入原始大小的 PNG。
+內容沒變的資料夾會直接跳過。
+
+Usage:
+    python3 screenshot_thumbnails.py ~/Pictures/Screenshots
+    python3 screenshot_thumbnails.py ~/Pictures/Screenshots --size 256 --columns 6 --per-sheet 60
+
+Requirements:
+    - Python 3.6+
+    - Pillow (pip install pillow)
+"""
+
+import os
+import re
+import sys
+import hashlib
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+try:
+    from PIL import Image
+    HAS_PILLOW = True
+except ImportError:
+    HAS_PILLOW = False
+
+
+THUMBS_DIR = '_thumbs'
+# 總覽圖分頁：contact_sheet_001.jpg、contact_sheet_002.jpg ...
+CONTACT_SHEET_PREFIX = 'contact_sheet'
+FINGERPRINT_NAME = '.fingerprint'
+
+# 縮圖最長邊、總覽圖每列幾張
+DEFAULT_SIZE = 320
+DEFAULT_COLUMNS = 8
+
+# 每張總覽圖最多幾張縮圖；預設 8x12 張 320px，約 2560x3840 (~30 MB RGB)
+DEFAULT_PER_SHEET = 96
+
+# 同時處理的資料夾數；每個行程一次只解碼一張圖，限制記憶體峰值
+DEFAULT_WORKERS = 2
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp'}
+DATE_FOLDER_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+# similar_screenshots.py 歸組的子資料夾
+GROUP_DIR_RE = re.compile(r'^similar_\d{3,}$')
+
+
+def list_images(folder):
+    """
+    資料夾與其 similar_NNN 子資料夾內的圖片，依相對路徑排序
+
+    Returns:
+        [(相對路徑, DirEntry)]
+    """
+    images = []
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.is_dir() and GROUP_DIR_RE.match(entry.name):
+                with os.scandir(entry.path) as group:
+                    images += [(f"{entry.name}/{e.name}", e) for e in group
+                               if e.is_file() and Path(e.name).suffix.lower() in IMAGE_EXTENSIONS]
+            elif entry.is_file() and Path(entry.name).suffix.lower() in IMAGE_EXTENSIONS:
+                images.append((entry.name, entry))
+    return sorted(images, key=lambda image: image[0])
+
+
+def thumb_name(rel):
+    """縮圖檔名；子資料夾中的圖片加上資料夾名稱前綴"""
+    return rel.replace('/', '__') + '.jpg'
+
+
+def folder_fingerprint(images, size, columns, per_sheet):
+    """以相對路徑、大小、修改時間與設定算出資料夾內容指紋"""
+    h = hashlib.sha1(f"{size}:{columns}:{per_sheet}".encode())
+    for rel, entry in images:
+        st = entry.stat()
+        h.update(f"{rel}\0{st.st_size}\0{st.st_mtime_ns}\n".encode('utf-8', 'surrogateescape'))
+    return h.hexdigest()
+
+
+def make_thumbnail(src, dst, size):
+    """產生單張縮圖；JPEG 用縮小解碼，不載入完整影像"""
+    with Image.open(src) as img:
+        img.draft('RGB', (size, size))
+        img.thumbnail((size, size))
+        img.convert('RGB').save(dst, 'JPEG', quality=80)
+
+
+def contact_sheet_name(page):
+    return f"{CONTACT_SHEET_PREFIX}_{page:03d}.jpg"
+
+
+def build_sheet(paths, dst, size, columns):
+    """把一頁縮圖貼成總覽圖；一次只開一張縮圖"""
+    rows = (len(paths) + columns - 1) // columns
+    sheet = Image.new('RGB', (min(len(paths), columns) * size, rows * size), 'white')
+    try:
+        for i, path in enumerate(paths):
+            with Image.open(path) as thumb:
+                x = (i % columns) * size + (size - thumb.width) // 2
+                y = (i // columns) * size + (size - thumb.height) // 2
+                sheet.paste(thumb, (x, y))
+        sheet.save(dst, 'JPEG', quality=80)
+    finally:
+        sheet.close()
+
+
+def build_folder(folder, size=DEFAULT_SIZE, columns=DEFAULT_COLUMNS, per_sheet=DEFAULT_PER_SHEET):
+    """
+    為單一資料夾產生縮圖與分頁的總覽圖
+
+    Returns:
+        (資料夾名稱, 新產生的縮圖數, 是否跳過)
+    """
+    folder = Path(folder)
+    thumbs = folder / THUMBS_DIR
+    images = list_images(folder)
+    fingerprint = folder_fingerprint(images, size, columns, per_sheet)
+
+    fingerprint_path = thumbs / FINGERPRINT_NAME
+    try:
+        if fingerprint_path.read_text() == fingerprint:
+            return folder.name, 0, True
+    except OSError:
+        pass
+
+    thumbs.mkdir(exist_ok=True)
+    made = 0
+    names = []
+    for rel, entry in images:
+        dst = thumbs / thumb_name(rel)
+        # 只重做不存在或比原圖舊的縮圖
+        if not dst.exists() or dst.stat().st_mtime_ns < entry.stat().st_mtime_ns:
+            try:
+                make_thumbnail(entry.path, dst, size)
+                made += 1
+            except Exception as e:
+                print(f"⚠️ {rel}: {e}")
+                continue
+        names.append(dst)
+
+    # 總覽圖分頁，畫布大小與記憶體不隨資料夾內的圖片數增加
+    per_sheet = max(per_sheet, 1)
+    sheets = set()
+    for page, start in enumerate(range(0, len(names), per_sheet), 1):
+        dst = thumbs / contact_sheet_name(page)
+        build_sheet(names[start:start + per_sheet], dst, size, columns)
+        sheets.add(dst.name)
+
+    # 移除已不存在的原圖所留下的縮圖、多出來的總覽圖頁面
+    keep = {dst.name for dst in names} | sheets
+    for old in thumbs.glob('*.jpg'):
+        if old.name not in keep:
+            old.unlink()
+
+    fingerprint_path.write_text(fingerprint)
+    return folder.name, made, False
+
+
+def date_folders(root):
+    """根目錄下的 YYYY-MM-DD 資料夾"""
+    root = Path(root).expanduser()
+    with os.scandir(root) as entries:
+        return sorted(Path(entry.path) for entry in entries
+                      if entry.is_dir() and DATE_FOLDER_RE.match(entry.name))
+
+
+def build_all(folders, size=DEFAULT_SIZE, columns=DEFAULT_COLUMNS, workers=DEFAULT_WORKERS,
+              per_sheet=DEFAULT_PER_SHEET):
+    """
+    用有上限的行程池處理多個資料夾；回傳處理 (未跳過) 的資料夾數。
+    單一資料夾失敗只會印出警告，不影響其他資料夾。
+    """
+    if not HAS_PILLOW:
+        print("❌ 需要 Pillow: pip install pillow")
+        return 0
+
+    built = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(build_folder, folder, size, columns, per_sheet): folder for folder in folders}
+        for future in as_completed(futures):
+            try:
+                name, made, skipped = future.result()
+            except Exception as e:
+                print(f"⚠️ {Path(futures[future]).name}: {e}")
+                continue
+            if skipped:
+                continue
+            built += 1
+            print(f"🖼️  {name}/{THUMBS_DIR}/ ({made} 張新縮圖)")
+    return built
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="為截圖日期資料夾產生縮圖與總覽圖")
+    parser.add_argument("root", nargs="?", default="~/Pictures/Screenshots", help="截圖輸出資料夾")
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE, help=f"縮圖大小 (預設: {DEFAULT_SIZE})")
+    parser.add_argument("--columns", type=int, default=DEFAULT_COLUMNS,
+                        help=f"總覽圖每列張數 (預設: {DEFAULT_COLUMNS})")
+    parser.add_argument("--per-sheet", type=int, default=DEFAULT_PER_SHEET,
+                        help=f"每張總覽圖最多幾張縮圖 (預設: {DEFAULT_PER_SHEET})")
+    parser.add_argument("--workers", "-w", type=int, default=DEFAULT_WORKERS,
+                        help=f"同時處理的資料夾數 (預設: {DEFAULT_WORKERS})")
+
+    args = parser.parse_args()
+
+    if not HAS_PILLOW:
+        print("❌ 需要 Pillow: pip install pillow")
+        sys.exit(1)
+
+    built = build_all(date_folders(args.root), args.size, args.columns, args.workers, args.per_sheet)
+    print(f"\n✅ 完成！更新了 {built} 個資料夾")
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Similar Screenshots - 把連拍的相似截圖歸到同一個子資料夾
+
+用縮小的灰階圖計算 dHash (感知雜湊)，再用 BK-tree 找漢明距離相近的截圖，
+每組相似截圖移到各自的子資料夾 (similar_001/, similar_002/ ...)。
+雜湊會存在資料夾內，重新執行時只計算新檔案；已歸組的截圖也會比對，
+新的相似截圖會併入原本的子資料夾。
+
+Usage:
+    python3 similar_screenshots.py ~/Pictures/Screenshots/2026-02-19
+    python3 similar_screenshots.py folder1 folder2 --threshold 6
+
+Requirements:
+    - Python 3.6+
+    - Pillow, NumPy (pip install pillow numpy)
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+    from PIL import Image
+    HAS_IMAGING = True
+except ImportError:
+    HAS_IMAGING = False
+
+
+# 雜湊快取 (存放在被整理的資料夾)
+HASH_INDEX_NAME = '.screenshot_hashes.json'
+
+# dHash 大小：8x8 = 64 bits
+HASH_SIZE = 8
+
+# 預設漢明距離門檻 (64 bits 中最多幾個不同)
+DEFAULT_THRESHOLD = 5
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp'}
+GROUP_DIR_RE = re.compile(r'^similar_\d{3,}$')
+
+
+def dhash(path):
+    """計算 64-bit dHash；無法讀取時回傳 None"""
+    try:
+        with Image.open(path) as img:
+            # JPEG 可直接用縮小的解碼，省記憶體與時間
+            img.draft('L', (HASH_SIZE * 8, HASH_SIZE * 8))
+            small = img.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.BILINEAR)
+        pixels = np.asarray(small, dtype=np.int16)
+        bits = pixels[:, 1:] > pixels[:, :-1]
+        return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+    except Exception:
+        return None
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+class BKTree:
+    """以漢明距離建的 BK-tree，查詢半徑內的雜湊不需兩兩比較"""
+
+    def __init__(self):
+        self.root = None  # [hash, item, {distance: child}]
+
+    def add(self, value, item):
+        if self.root is None:
+            self.root = [value, item, {}]
+            return
+        node = self.root
+        while True:
+            d = hamming(value, node[0])
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [value, item, {}]
+                return
+            node = child
+
+    def search(self, value, radius):
+        """回傳距離 <= radius 的所有 item"""
+        if self.root is None:
+            return []
+        found = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            d = hamming(value, node[0])
+            if d <= radius:
+                found.append(node[1])
+            for dist, child in node[2].items():
+                if d - radius <= dist <= d + radius:
+                    stack.append(child)
+        return found
+
+
+def group_hashes(hashes, threshold=DEFAULT_THRESHOLD):
+    """
+    把相似的雜湊分組
+
+    Args:
+        hashes: [(item, hash)]
+    Returns:
+        [[item, ...]] 只包含兩個以上的組
+    """
+    parent = list(range(len(hashes)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    tree = BKTree()
+    for i, (_, value) in enumerate(hashes):
+        for j in tree.search(value, threshold):
+            parent[find(i)] = find(j)
+        tree.add(value, i)
+
+    groups = {}
+    for i, (item, _) in enumerate(hashes):
+        groups.setdefault(find(i), []).append(item)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def _load_index(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_index(path, index):
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    os.replace(tmp, path)
+
+
+def _index_key(st):
+    return f"{st.st_dev}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}"
+
+
+def list_images(folder):
+    """資料夾與其 similar_NNN 子資料夾內的圖片"""
+    files = []
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.is_dir() and GROUP_DIR_RE.match(entry.name):
+                with os.scandir(entry.path) as group:
+                    files += [e for e in group
+                              if e.is_file() and Path(e.name).suffix.lower() in IMAGE_EXTENSIONS]
+            elif entry.is_file() and Path(entry.name).suffix.lower() in IMAGE_EXTENSIONS:
+                files.append(entry)
+    return sorted(files, key=lambda entry: entry.path)
+
+
+def hash_folder(folder, workers=None):
+    """
+    計算資料夾 (含已歸組的子資料夾) 內圖片的 dHash，已快取的檔案不重算；
+    回傳 [(Path, hash)]
+    """
+    index_path = folder / HASH_INDEX_NAME
+    index = _load_index(index_path)
+
+    files = list_images(folder)
+
+    keys = {entry.path: _index_key(entry.stat()) for entry in files}
+    todo = [entry.path for entry in files if keys[entry.path] not in index]
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for path, value in zip(todo, pool.map(dhash, todo, chunksize=16)):
+                index[keys[path]] = None if value is None else f"{value:016x}"
+
+    # 只保留目前還在資料夾裡的檔案
+    index = {key: index[key] for key in keys.values() if key in index}
+    _save_index(index_path, index)
+
+    return [(Path(path), int(index[key], 16)) for path, key in keys.items() if index[key]]
+
+
+def _next_group_folder(folder, start):
+    n = start
+    while (folder / f"similar_{n:03d}").exists():
+        n += 1
+    return n
+
+
+def group_similar(folder, threshold=DEFAULT_THRESHOLD, workers=None):
+    """
+    將資料夾內相似的截圖移到各自的子資料夾；與已歸組截圖相似的新檔案
+    會併入該組的子資料夾
+
+    Returns:
+        int: 建立或新增了截圖的組數
+    """
+    if not HAS_IMAGING:
+        print("❌ 需要 Pillow 與 NumPy: pip install pillow numpy")
+        return 0
+
+    folder = Path(folder).expanduser()
+    groups = group_hashes(hash_folder(folder, workers), threshold)
+
+    n = 1
+    changed = 0
+    for group in groups:
+        loose = [file for file in group if file.parent == folder]
+        grouped = [file for file in group if file.parent != folder]
+        # 全部都已經歸組，不必動
+        if not loose:
+            continue
+        if grouped:
+            # 併入既有的子資料夾
+            target = grouped[0].parent
+        else:
+            n = _next_group_folder(folder, n)
+            target = folder / f"similar_{n:03d}"
+            target.mkdir()
+        moved = 0
+        for file in loose:
+            if (target / file.name).exists():
+                print(f"⚠️ {target.name}/{file.name} 已存在，略過")
+                continue
+            os.rename(file, target / file.name)
+            moved += 1
+        print(f"🔗 {moved} 張相似截圖 → {folder.name}/{target.name}/")
+        changed += 1
+
+    return changed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="把相似截圖歸到同一個子資料夾")
+    parser.add_argument("folders", nargs="+", help="要整理的資料夾")
+    parser.add_argument("--threshold", "-t", type=int, default=DEFAULT_THRESHOLD,
+                        help=f"漢明距離門檻 (預設: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--workers", "-w", type=int, help="計算雜湊的行程數")
+
+    args = parser.parse_args()
+
+    if not HAS_IMAGING:
+        print("❌ 需要 Pillow 與 NumPy: pip install pillow numpy")
+        sys.exit(1)
+
+    total = sum(group_similar(folder, args.threshold, args.workers) for folder in args.folders)
+    print(f"\n✅ 完成！共 {total} 組相似截圖")
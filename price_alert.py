@@ -2,65 +2,1039 @@
 """
 Crypto Price Alert - Monitor prices and send alerts
 Usage: python3 price_alert.py --coin bitcoin --above 70000 --below 60000
+       python3 price_alert.py --rules alerts.json --watch [--interval 60 --min-interval 10]
+       python3 price_alert.py --rules alerts.json --stream [--record ticks.jsonl]
+       python3 price_alert.py --replay-server ticks.jsonl --port 8765
+       python3 price_alert.py --benchmark-stream [ticks.jsonl]
+
+Rules file (JSON, or YAML if PyYAML is installed):
+  {"rules": [
+    {"coin": "bitcoin", "above": 70000},
+    {"coin": "bitcoin", "below": 60000},
+    {"coin": "ethereum", "move": 5, "window": 3600},
+    {"coin": "solana", "cross": 150, "hysteresis": 2}
+  ]}
+  above/below  fire when the price crosses the threshold
+  move         fires when the price moved at least N% within window seconds
+  cross        fires on each crossing of the level, but only after the price
+               went hysteresis past the other side (no flapping)
+
+Every fetched price is recorded in the local history store (price_history.py),
+so move rules see the ticks from earlier runs: a 24h move rule works from the
+first check of a new run without extra API calls.
 """
 
 import requests
+import os
 import sys
+import json
 import time
+import uuid
+import queue
+import random
+import smtplib
+import threading
+import socketserver
+import bisect
+import asyncio
 import argparse
+import tempfile
 from datetime import datetime
+from email.message import EmailMessage
+from email.utils import parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from price_history import PriceHistory, DEFAULT_DB
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None
 
 COINGECKO_API = "https://api.coingecko.com/api/v3"
 
-def get_price(coin_id):
-    """Get current price for a coin"""
+DEFAULT_WINDOW = 3600
+
+# Watch scheduling: poll every --interval when far from any threshold, down to
+# --min-interval when within NEAR_PCT of one, never faster than the quota
+NEAR_PCT = 5
+MIN_INTERVAL = 10
+RATE_LIMIT = 10        # CoinGecko public API: roughly 10-30 calls/min; 30 with a demo key
+RATE_BURST = 3
+BACKOFF_MAX = 600
+
+# Alert delivery: sinks run on worker threads behind a bounded queue; every
+# delivery is written to the outbox first and removed once it succeeds
+OUTBOX = os.path.expanduser("~/.price_alert_outbox.json")
+DELIVERY_WORKERS = 4
+DELIVERY_QUEUE = 100
+COOLDOWN = 900          # same alert is not re-sent within 15 minutes
+RETRY_BASE = 5
+MAX_ATTEMPTS = 8
+TELEGRAM_API = "https://api.telegram.org"
+
+# Streaming mode: Binance combined ticker stream (no key needed)
+STREAM_URL = "wss://stream.binance.com:9443/stream?streams="
+BINANCE_SYMBOLS = {
+    "bitcoin": "btcusdt",
+    "ethereum": "ethusdt",
+    "solana": "solusdt",
+    "binancecoin": "bnbusdt",
+    "ripple": "xrpusdt",
+    "cardano": "adausdt",
+    "dogecoin": "dogeusdt",
+    "avalanche-2": "avaxusdt",
+}
+RECONNECT_MIN = 1
+RECONNECT_MAX = 60
+
+class RateLimited(Exception):
+    """CoinGecko answered 429; retry_after is in seconds (None if not given)"""
+
+    def __init__(self, retry_after=None):
+        super().__init__(f"rate limited (retry after {retry_after}s)" if retry_after else "rate limited")
+        self.retry_after = retry_after
+
+def parse_retry_after(value):
+    """Retry-After is either seconds or an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return None
+
+def get_prices(coin_ids):
+    """Get current prices for many coins in one request; raises RateLimited on 429"""
     url = f"{COINGECKO_API}/simple/price"
     params = {
-        'ids': coin_id,
+        'ids': ','.join(sorted(coin_ids)),
         'vs_currencies': 'usd'
     }
     try:
         resp = requests.get(url, params=params, timeout=10)
+        if resp.status_code == 429:
+            raise RateLimited(parse_retry_after(resp.headers.get('Retry-After')))
         data = resp.json()
-        return data.get(coin_id, {}).get('usd')
+        return {coin: info['usd'] for coin, info in data.items() if 'usd' in info}
+    except RateLimited:
+        raise
     except Exception as e:
         print(f"Error: {e}")
-        return None
+        return {}
 
-def check_alerts(coin_id, above, below):
+def get_price(coin_id):
+    """Get current price for a coin"""
+    return get_prices([coin_id]).get(coin_id)
+
+def check_alerts(coin_id, above, below, dispatcher=None, history=None):
     """Check price and send alert if conditions met"""
     price = get_price(coin_id)
     if price is None:
         return
+    if history:
+        history.record({coin_id: price})
     
     print(f"📊 {coin_id}: ${price:,.2f} ({datetime.now().strftime('%H:%M:%S')})")
     
     if above and price >= above:
         print(f"🚀 ALERT: {coin_id} is ABOVE ${above:,.2f}! Current: ${price:,.2f}")
+        if dispatcher:
+            dispatcher.submit(f"{coin_id}:above:{above}", coin_id, price, f"🚀 {coin_id} is ABOVE ${above:,.2f}")
     
     if below and price <= below:
         print(f"📉 ALERT: {coin_id} is BELOW ${below:,.2f}! Current: ${price:,.2f}")
+        if dispatcher:
+            dispatcher.submit(f"{coin_id}:below:{below}", coin_id, price, f"📉 {coin_id} is BELOW ${below:,.2f}")
+    
+    return price
+
+def load_rules(path):
+    """Load the rule list from a JSON or YAML file"""
+    with open(path) as f:
+        if path.endswith(('.yaml', '.yml')):
+            if yaml is None:
+                print("❌ YAML rules need PyYAML: pip install pyyaml")
+                sys.exit(1)
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+    rules = data['rules'] if isinstance(data, dict) else data
+    for rule in rules:
+        rule['coin'] = rule['coin'].lower()
+        if not any(key in rule for key in ('above', 'below', 'move', 'cross')):
+            raise ValueError(f"Rule needs above, below, move or cross: {rule}")
+    return rules
+
+class Thresholds:
+    """Rules sorted by trigger value, so a price move only visits the rules it crossed"""
+
+    def __init__(self):
+        self.keys = []
+        self.items = []
+
+    def add(self, value, item):
+        i = bisect.bisect_right(self.keys, value)
+        self.keys.insert(i, value)
+        self.items.insert(i, item)
+
+    def between(self, low, high):
+        """Items with low < value <= high"""
+        return self.items[bisect.bisect_right(self.keys, low):bisect.bisect_right(self.keys, high)]
+
+class CoinRules:
+    """All rules for one coin plus the state needed to evaluate them"""
+
+    def __init__(self):
+        self.rising = Thresholds()   # fire when the price rises through the value
+        self.falling = Thresholds()  # fire when the price falls through the value
+        self.cross = []
+        self.moves = {}              # window -> Thresholds of move %
+        self.last_up = {}            # window -> last upward % move (0 if down)
+        self.last_down = {}          # window -> last downward % move, positive (0 if up)
+        self.times = []              # tick times covering the longest window
+        self.prices = []
+        self.dropped = 0             # ticks trimmed from the front of times/prices
+        self.starts = {}             # window -> absolute index of its oldest tick
+        self.price = None
+
+    def add_tick(self, now, price):
+        self.times.append(now)
+        self.prices.append(price)
+
+    def window_start(self, window, now):
+        """Oldest price inside the window; the pointer only moves forward, so O(1) amortized"""
+        i = self.starts.get(window, self.dropped) - self.dropped
+        limit = now - window
+        last = len(self.times) - 1
+        while i < last and self.times[i] < limit:
+            i += 1
+        self.starts[window] = i + self.dropped
+        return self.prices[i]
+
+    def trim(self):
+        """Drop ticks no window reaches any more, in bulk once they are half the buffer"""
+        first = min(self.starts.values()) - self.dropped
+        if first > len(self.times) // 2:
+            del self.times[:first]
+            del self.prices[:first]
+            self.dropped += first
+
+class AlertEngine:
+    """
+    Evaluates hundreds of rules against one batched price fetch per tick.
+    Each tick only visits the rules whose threshold lies between the previous
+    and the current value.
+    """
+
+    def __init__(self, rules, history=None):
+        self.coins = {}
+        self.count = len(rules)
+        self.history = history
+        for rule in rules:
+            book = self.coins.setdefault(rule['coin'], CoinRules())
+            if 'above' in rule:
+                book.rising.add(rule['above'], rule)
+            if 'below' in rule:
+                # Stored negated, so a falling price is a rising key
+                book.falling.add(-rule['below'], rule)
+            if 'cross' in rule:
+                h = rule.get('hysteresis', 0)
+                rule['side'] = None
+                book.rising.add(rule['cross'] + h, rule)
+                book.falling.add(-(rule['cross'] - h), rule)
+                book.cross.append(rule)
+            if 'move' in rule:
+                book.moves.setdefault(rule.get('window', DEFAULT_WINDOW), Thresholds()).add(rule['move'], rule)
+
+    def distance(self):
+        """
+        Smallest relative gap between any coin's price and its nearest trigger
+        (or between a move rule and its threshold); None if nothing is known yet
+        """
+        gaps = []
+        for book in self.coins.values():
+            if book.price is None:
+                continue
+            i = bisect.bisect_right(book.rising.keys, book.price)
+            if i < len(book.rising.keys):
+                gaps.append(book.rising.keys[i] / book.price - 1)
+            i = bisect.bisect_right(book.falling.keys, -book.price)
+            if i < len(book.falling.keys):
+                gaps.append(1 - -book.falling.keys[i] / book.price)
+            for window, thresholds in book.moves.items():
+                for moved in (book.last_up.get(window, 0), book.last_down.get(window, 0)):
+                    i = bisect.bisect_right(thresholds.keys, moved)
+                    if i < len(thresholds.keys):
+                        gaps.append((thresholds.keys[i] - moved) / 100)
+        return min(gaps) if gaps else None
+
+    def tick(self, prices, now=None):
+        """Feed one batch of prices; returns [(coin, price, message, rule)] for rules that fired"""
+        now = time.time() if now is None else now
+        fired = []
+        for coin, price in prices.items():
+            book = self.coins.get(coin)
+            if book is not None:
+                fired += self._tick_coin(coin, book, price, now)
+        if self.history:
+            self.history.record(prices, now)
+        return fired
+
+    def _tick_coin(self, coin, book, price, now):
+        fired = []
+        old = book.price
+        book.price = price
+
+        if old is None:
+            if book.moves and self.history:
+                # Move windows start from the recorded ticks, not from scratch
+                for t, p in self.history.series(coin, now - max(book.moves), now):
+                    book.add_tick(t, p)
+            # First price: thresholds already passed fire, crossings only arm
+            for rule in book.cross:
+                rule['side'] = 'above' if price >= rule['cross'] else 'below'
+            crossed_up = [r for r in book.rising.between(float('-inf'), price) if 'above' in r]
+            crossed_down = [r for r in book.falling.between(float('-inf'), -price) if 'below' in r]
+        elif price > old:
+            crossed_up, crossed_down = book.rising.between(old, price), []
+        elif price < old:
+            crossed_up, crossed_down = [], book.falling.between(-old, -price)
+        else:
+            crossed_up = crossed_down = []
+
+        for rule in crossed_up:
+            if 'cross' in rule and price >= rule['cross'] + rule.get('hysteresis', 0):
+                if rule['side'] == 'below':
+                    rule['side'] = 'above'
+                    fired.append((coin, price, f"🚀 {coin} crossed ABOVE ${rule['cross']:,.2f}", rule))
+            elif 'above' in rule and price >= rule['above']:
+                fired.append((coin, price, f"🚀 {coin} is ABOVE ${rule['above']:,.2f}", rule))
+        for rule in crossed_down:
+            if 'cross' in rule and price <= rule['cross'] - rule.get('hysteresis', 0):
+                if rule['side'] == 'above':
+                    rule['side'] = 'below'
+                    fired.append((coin, price, f"📉 {coin} crossed BELOW ${rule['cross']:,.2f}", rule))
+            elif 'below' in rule and price <= rule['below']:
+                fired.append((coin, price, f"📉 {coin} is BELOW ${rule['below']:,.2f}", rule))
+
+        if book.moves:
+            book.add_tick(now, price)
+            for window, thresholds in book.moves.items():
+                fired += self._check_moves(coin, book, window, thresholds, price, now)
+            book.trim()
+        return fired
+
+    def _check_moves(self, coin, book, window, thresholds, price, now):
+        # Reference: oldest price inside the window (or since start)
+        start = book.window_start(window, now)
+        change = (price / start - 1) * 100 if start else 0
+        # Up and down moves are edge-triggered separately, so +7% then -8% fires both ways
+        up, down = max(change, 0), max(-change, 0)
+        previous_up = book.last_up.get(window, 0)
+        previous_down = book.last_down.get(window, 0)
+        book.last_up[window] = up
+        book.last_down[window] = down
+        if up > previous_up:
+            crossed, arrow = thresholds.between(previous_up, up), "🚀"
+        elif down > previous_down:
+            crossed, arrow = thresholds.between(previous_down, down), "📉"
+        else:
+            return []
+        return [(coin, price, f"{arrow} {coin} moved {change:+.2f}% in {window / 60:g} min (rule {rule['move']}%)", rule)
+                for rule in crossed]
+
+class TokenBucket:
+    """Allows `rate` calls per minute on average, with bursts up to `capacity`"""
+
+    def __init__(self, rate=RATE_LIMIT, capacity=RATE_BURST):
+        self.rate = rate / 60
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def acquire(self):
+        """Take a token, sleeping until one is available"""
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            time.sleep((1 - self.tokens) / self.rate)
+
+class PollStats:
+    """Achieved poll rate and start-time jitter against the schedule"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.polls = 0
+        self.jitter = []
+        self.rate_limited = 0
+
+    def record(self, scheduled, actual):
+        self.polls += 1
+        self.jitter.append((actual - scheduled) * 1000)
+
+    def report(self):
+        if not self.polls:
+            return
+        minutes = (time.monotonic() - self.started) / 60
+        ordered = sorted(self.jitter)
+        print(f"📊 {self.polls} polls, {self.polls / max(minutes, 1 / 60):.2f}/min, "
+              f"{self.rate_limited} rate-limited")
+        print(f"   jitter mean {sum(ordered) / len(ordered):.1f} ms  "
+              f"p95 {ordered[int(len(ordered) * 0.95)]:.1f} ms  max {ordered[-1]:.1f} ms")
+
+class PollScheduler:
+    """
+    Runs poll() on absolute monotonic deadlines, so request latency does not
+    drift the period. poll() returns the relative distance to the nearest
+    threshold: within NEAR_PCT the interval shrinks linearly toward
+    min_interval. A token bucket caps the call rate; 429 responses back off
+    for Retry-After (or exponentially when no header is sent).
+    """
+
+    def __init__(self, interval, min_interval=MIN_INTERVAL, bucket=None):
+        self.interval = interval
+        self.min_interval = min(min_interval, interval)
+        self.bucket = bucket or TokenBucket()
+        self.stats = PollStats()
+        self.backoff = 0
+
+    def interval_for(self, distance):
+        if distance is None:
+            return self.interval
+        scale = min(abs(distance) * 100 / NEAR_PCT, 1)
+        return self.min_interval + (self.interval - self.min_interval) * scale
+
+    def run(self, poll):
+        deadline = time.monotonic()
+        while True:
+            wait = deadline - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self.bucket.acquire()
+            self.stats.record(deadline, time.monotonic())
+            try:
+                distance = poll()
+            except RateLimited as e:
+                self.stats.rate_limited += 1
+                self.backoff = min(max(self.backoff * 2, self.interval), BACKOFF_MAX)
+                pause = e.retry_after if e.retry_after is not None else self.backoff
+                print(f"⏳ Rate limited, pausing {pause:.0f}s")
+                deadline = time.monotonic() + pause
+                continue
+            self.backoff = 0
+            deadline = max(deadline + self.interval_for(distance), time.monotonic())
+
+def nearest(price, thresholds):
+    """Relative distance from price to the closest threshold"""
+    if price is None or not thresholds:
+        return None
+    return min(abs(t / price - 1) for t in thresholds)
+
+def run_rules(engine, scheduler=None, dispatcher=None):
+    """Fetch all rule coins in one request per tick and print fired alerts"""
+    coins = list(engine.coins)
+    print(f"👀 {engine.count} rules on {len(coins)} coins")
+
+    def poll():
+        prices = get_prices(coins)
+        stamp = datetime.now().strftime('%H:%M:%S')
+        for coin, price, message, rule in engine.tick(prices):
+            print(f"{message}! Current: ${price:,.2f} ({stamp})")
+            if dispatcher:
+                dispatcher.submit(rule_key(rule), coin, price, message)
+        return engine.distance()
+
+    if scheduler is None:
+        poll()
+    else:
+        scheduler.run(poll)
+
+def rule_key(rule):
+    """Stable identity of a rule, for cooldown/dedupe across restarts"""
+    return json.dumps({k: v for k, v in rule.items() if k != 'side'}, sort_keys=True)
+
+class WebhookSink:
+    """POST the alert as JSON"""
+
+    def __init__(self, url):
+        self.name = f"webhook:{url}"
+        self.url = url
+
+    def send(self, alert):
+        resp = requests.post(self.url, json={"text": alert['message'], "coin": alert['coin'],
+                                             "price": alert['price'], "time": alert['time']}, timeout=10)
+        resp.raise_for_status()
+
+class TelegramSink:
+    """Telegram Bot API sendMessage (api can point at a compatible local server)"""
+
+    def __init__(self, token, chat_id, api=TELEGRAM_API):
+        self.name = f"telegram:{chat_id}"
+        self.url = f"{api}/bot{token}/sendMessage"
+        self.chat_id = chat_id
+
+    def send(self, alert):
+        resp = requests.post(self.url, json={"chat_id": self.chat_id, "text": alert['message']}, timeout=10)
+        resp.raise_for_status()
+
+class SmtpSink:
+    """E-mail via SMTP; credentials from SMTP_USER / SMTP_PASSWORD, sender from SMTP_FROM"""
+
+    def __init__(self, host, port, to, starttls=False):
+        self.name = f"smtp:{to}"
+        self.host, self.port, self.to = host, port, to
+        self.starttls = starttls
+        self.sender = os.environ.get('SMTP_FROM', 'price-alert@localhost')
+
+    def send(self, alert):
+        msg = EmailMessage()
+        msg['Subject'] = alert['message']
+        msg['From'] = self.sender
+        msg['To'] = self.to
+        msg.set_content(f"{alert['message']}\nCurrent: ${alert['price']:,.2f}\nTime: {alert['time']}")
+        with smtplib.SMTP(self.host, self.port, timeout=10) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if os.environ.get('SMTP_USER'):
+                smtp.login(os.environ['SMTP_USER'], os.environ.get('SMTP_PASSWORD', ''))
+            smtp.send_message(msg)
+
+class FileSink:
+    """Append alerts as JSON lines"""
+
+    def __init__(self, path):
+        self.name = f"file:{path}"
+        self.path = path
+        self.lock = threading.Lock()
+
+    def send(self, alert):
+        with self.lock, open(self.path, 'a') as f:
+            f.write(json.dumps(alert) + "\n")
+
+def parse_sink(spec):
+    """
+    Build a sink from a spec string:
+      webhook=URL  telegram=TOKEN@CHAT_ID[@API]  smtp=HOST:PORT/TO[/starttls]  file=PATH
+    """
+    kind, _, value = spec.partition('=')
+    if kind == 'webhook':
+        return WebhookSink(value)
+    if kind == 'telegram':
+        token, chat_id, *api = value.split('@', 2)
+        return TelegramSink(token, chat_id, *api)
+    if kind == 'smtp':
+        server, to, *options = value.split('/')
+        host, _, port = server.partition(':')
+        return SmtpSink(host, int(port or 25), to, 'starttls' in options)
+    if kind == 'file':
+        return FileSink(os.path.expanduser(value))
+    raise ValueError(f"Unknown sink: {spec}")
+
+class AlertDispatcher:
+    """
+    Delivers alerts to every sink without blocking price evaluation.
+    submit() applies the cooldown, writes one delivery per sink to the
+    persisted outbox and queues it; worker threads send, failures are retried
+    with exponential backoff, and anything left over is resumed next run.
+    Outbox items for sinks not configured in this run are kept untouched.
+    Several runs can share the outbox: each save merges with the file under
+    an exclusive lock instead of overwriting the other runs' items.
+    """
+
+    def __init__(self, sinks, cooldown=COOLDOWN, workers=DELIVERY_WORKERS, outbox=OUTBOX,
+                 retry_base=RETRY_BASE):
+        self.sinks = {sink.name: sink for sink in sinks}
+        self.cooldown = cooldown
+        self.retry_base = retry_base
+        self.path = outbox
+        self.lock = threading.Lock()
+        self.queue = queue.Queue(maxsize=DELIVERY_QUEUE)
+        self.sent = self.failed = 0
+        state = self._load()
+        self.last_sent = state.get('last_sent', {})
+        self.pending = {item['id']: dict(item, queued=False) for item in state.get('pending', [])
+                        if item['sink'] in self.sinks}
+        self.done = set()  # ids delivered or dropped since the last save
+        # Deliveries for other sinks wait for a run that configures them
+        self.parked = [item for item in state.get('pending', []) if item['sink'] not in self.sinks]
+        self.stopping = threading.Event()
+        self.threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(workers)]
+        self.threads.append(threading.Thread(target=self._retry_loop, daemon=True))
+        for thread in self.threads:
+            thread.start()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        """Merge cooldown and outbox into the file; caller holds the lock"""
+        with open(self.path + '.lock', 'a') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            state = self._load()
+            for key, sent in state.get('last_sent', {}).items():
+                if sent > self.last_sent.get(key, 0):
+                    self.last_sent[key] = sent
+            # Keep items of other runs (and parked ones) as the file has them
+            others = [item for item in state.get('pending', [])
+                      if item['id'] not in self.pending and item['id'] not in self.done]
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w') as f:
+                json.dump({"last_sent": self.last_sent, "pending": list(self.pending.values()) + others}, f)
+            os.replace(tmp, self.path)
+        self.done.clear()
+
+    def submit(self, key, coin, price, message):
+        """Queue an alert for every sink; returns False if it is still in cooldown"""
+        now = time.time()
+        with self.lock:
+            if now - self.last_sent.get(key, 0) < self.cooldown:
+                return False
+            self.last_sent[key] = now
+            alert = {"key": key, "coin": coin, "price": price, "message": message,
+                     "time": datetime.now().isoformat(timespec='seconds')}
+            items = [{"id": uuid.uuid4().hex, "sink": name, "alert": alert, "attempts": 0, "due": now,
+                      "queued": True} for name in self.sinks]
+            for item in items:
+                self.pending[item['id']] = item
+            self._save()
+        for item in items:
+            self._enqueue(item)
+        return True
+
+    def _enqueue(self, item):
+        try:
+            self.queue.put_nowait(item['id'])
+        except queue.Full:
+            # Stays in the outbox; the retry loop picks it up
+            with self.lock:
+                item['queued'] = False
+
+    def _worker(self):
+        while True:
+            item_id = self.queue.get()
+            with self.lock:
+                item = self.pending.get(item_id)
+            if item is None:
+                continue
+            try:
+                self.sinks[item['sink']].send(item['alert'])
+            except Exception as e:
+                self._failed(item, e)
+            else:
+                with self.lock:
+                    self.pending.pop(item_id, None)
+                    self.done.add(item_id)
+                    self.sent += 1
+                    self._save()
+
+    def _failed(self, item, error):
+        with self.lock:
+            item['attempts'] += 1
+            if item['attempts'] >= MAX_ATTEMPTS:
+                self.pending.pop(item['id'], None)
+                self.done.add(item['id'])
+                self.failed += 1
+                print(f"❌ Gave up delivering to {item['sink']}: {str(error)[:60]}")
+            else:
+                item['due'] = time.time() + self.retry_base * 2 ** (item['attempts'] - 1)
+                item['queued'] = False
+            self._save()
+
+    def _retry_loop(self):
+        """Re-queue outbox items that are due (failed, overflowed, or left from a previous run)"""
+        while not self.stopping.wait(1):
+            now = time.time()
+            with self.lock:
+                due = [item for item in self.pending.values()
+                       if item['due'] <= now and not item.get('queued')]
+                for item in due:
+                    item['queued'] = True
+            for item in due:
+                self._enqueue(item)
+
+    def close(self, timeout=10):
+        """Wait up to timeout for pending deliveries; the rest stay in the outbox"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self.lock:
+                if not self.pending:
+                    break
+            time.sleep(0.1)
+        self.stopping.set()
+        with self.lock:
+            left = len(self.pending)
+        if left:
+            print(f"📮 {left} alert deliveries left in {self.path}")
+        if self.parked:
+            print(f"📮 {len(self.parked)} deliveries kept for sinks not configured in this run")
+
+class RecordingHTTPHandler(BaseHTTPRequestHandler):
+    """Local webhook/Telegram stand-in: records JSON bodies, fails the first `fail` requests"""
+    received = []
+    fail = 0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        cls = type(self)
+        if cls.fail > 0:
+            cls.fail -= 1
+            self.send_response(503)
+        else:
+            cls.received.append((self.path, body))
+            self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+class RecordingSMTPHandler(socketserver.StreamRequestHandler):
+    """Minimal local SMTP stand-in that records each message"""
+    messages = []
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.reply("220 localhost stand-in")
+        while True:
+            line = self.rfile.readline().decode(errors='replace').strip()
+            command = line[:4].upper()
+            if not line or command == 'QUIT':
+                self.reply("221 bye")
+                return
+            if command == 'EHLO':
+                self.reply("250 localhost")
+            elif command == 'DATA':
+                self.reply("354 end with .")
+                data = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if chunk in (b".\r\n", b".\n", b""):
+                        break
+                    data.append(chunk)
+                type(self).messages.append(b"".join(data).decode(errors='replace'))
+                self.reply("250 queued")
+            else:
+                self.reply("250 ok")
+
+def test_delivery():
+    """Deliver sample alerts to local HTTP/SMTP stand-ins and report what arrived"""
+    http = ThreadingHTTPServer(('127.0.0.1', 0), RecordingHTTPHandler)
+    smtp = socketserver.ThreadingTCPServer(('127.0.0.1', 0), RecordingSMTPHandler)
+    for server in (http, smtp):
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{http.server_address[1]}"
+    RecordingHTTPHandler.fail = 2  # exercise retries
+
+    tmp = tempfile.TemporaryDirectory()
+    log = os.path.join(tmp.name, 'alerts.jsonl')
+    sinks = [WebhookSink(f"{base}/hook"), TelegramSink("123:TEST", "42", base),
+             SmtpSink('127.0.0.1', smtp.server_address[1], 'me@example.com'), FileSink(log)]
+    dispatcher = AlertDispatcher(sinks, outbox=os.path.join(tmp.name, 'outbox.json'), retry_base=0.2)
+    print(f"📨 first alert queued: {dispatcher.submit('test', 'bitcoin', 70000.0, '🚀 bitcoin is ABOVE $69,000.00')}")
+    print(f"📨 repeat within cooldown queued: {dispatcher.submit('test', 'bitcoin', 70100.0, '🚀 bitcoin is ABOVE $69,000.00')}")
+    dispatcher.close(timeout=15)
+    print(f"   HTTP requests: {len(RecordingHTTPHandler.received)} "
+          f"({', '.join(path for path, _ in RecordingHTTPHandler.received)}), 2 failed first")
+    print(f"   SMTP messages: {len(RecordingSMTPHandler.messages)}")
+    with open(log) as f:
+        print(f"   file lines: {len(f.readlines())}")
+    print(f"   delivered {dispatcher.sent}, gave up {dispatcher.failed}, outbox {len(dispatcher.pending)}")
+    tmp.cleanup()
+    http.shutdown()
+    smtp.shutdown()
+
+def parse_tick(message, symbols):
+    """Parse a combined-stream ticker message into (coin, price, event time ms)"""
+    try:
+        data = json.loads(message)['data']
+        return symbols[data['s'].lower()], float(data['c']), data['E']
+    except (ValueError, KeyError, TypeError):
+        return None
+
+class StreamStats:
+    """Event-to-alert latency and throughput of the stream"""
+
+    def __init__(self):
+        self.latencies = []
+        self.alerts = 0
+        self.started = time.perf_counter()
+
+    def add(self, event_ms):
+        self.latencies.append(time.time() * 1000 - event_ms)
+
+    def report(self):
+        n = len(self.latencies)
+        if not n:
+            print("📊 No ticks received")
+            return
+        elapsed = time.perf_counter() - self.started
+        ordered = sorted(self.latencies)
+        print(f"📊 {n:,} ticks in {elapsed:.2f}s ({n / elapsed:,.0f} ticks/sec), {self.alerts:,} alerts")
+        print(f"   latency p50 {ordered[n // 2]:.2f} ms  p99 {ordered[int(n * 0.99)]:.2f} ms"
+              f"  max {ordered[-1]:.2f} ms")
+
+async def stream_alerts(engine, url=None, record=None, stats=None, stop_on_close=False, quiet=False,
+                        dispatcher=None):
+    """
+    Evaluate alerts on every ticker message. Reconnects with exponential
+    backoff (with jitter) after errors or server-side closes.
+    """
+    symbols = {BINANCE_SYMBOLS.get(coin, coin): coin for coin in engine.coins}
+    url = url or STREAM_URL + '/'.join(f"{symbol}@ticker" for symbol in symbols)
+    delay = RECONNECT_MIN
+    while True:
+        try:
+            async with websockets.connect(url, ping_interval=20, max_queue=None) as ws:
+                delay = RECONNECT_MIN
+                print(f"🔌 Connected to {url.split('?')[0]}")
+                async for message in ws:
+                    tick = parse_tick(message, symbols)
+                    if tick is None:
+                        continue
+                    coin, price, event_ms = tick
+                    fired = engine.tick({coin: price})
+                    for _, price, text, rule in fired:
+                        if not quiet:
+                            print(f"{text}! Current: ${price:,.2f} ({datetime.now().strftime('%H:%M:%S')})")
+                        if dispatcher:
+                            dispatcher.submit(rule_key(rule), coin, price, text)
+                    if stats:
+                        stats.add(event_ms)
+                        stats.alerts += len(fired)
+                    if record:
+                        record.write(json.dumps({"t": event_ms, "s": coin if coin not in BINANCE_SYMBOLS
+                                                 else BINANCE_SYMBOLS[coin], "c": price}) + "\n")
+            if stop_on_close:
+                return
+            print("⚠️ Stream closed by server")
+        except (OSError, asyncio.TimeoutError, websockets.exceptions.WebSocketException) as e:
+            print(f"⚠️ Stream error: {str(e)[:60]}")
+        wait = delay * random.uniform(0.5, 1.0)
+        print(f"🔁 Reconnecting in {wait:.1f}s")
+        await asyncio.sleep(wait)
+        delay = min(delay * 2, RECONNECT_MAX)
+
+def load_ticks(path):
+    """Read a recorded tick file: JSON lines {"t": ms, "s": symbol, "c": price}"""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def synthetic_ticks(count=100_000, seed=42):
+    """Random-walk ticks for the benchmark when no recording is given"""
+    rng = random.Random(seed)
+    prices = {"btcusdt": 65000.0, "ethusdt": 3500.0, "solusdt": 150.0}
+    ticks = []
+    for n in range(count):
+        symbol = rng.choice(list(prices))
+        prices[symbol] *= 1 + rng.gauss(0, 0.001)
+        ticks.append({"t": n * 10, "s": symbol, "c": round(prices[symbol], 4)})
+    return ticks
+
+async def start_replay_server(ticks, host='127.0.0.1', port=8765, speed=1.0):
+    """
+    Serve recorded ticks as a Binance-style combined stream to every client.
+    speed scales the recorded gaps (0 = as fast as possible); the event time
+    is stamped at send time so clients can measure latency.
+    """
+    async def handler(ws):
+        start = time.monotonic()
+        first = ticks[0]['t'] if ticks else 0
+        try:
+            for tick in ticks:
+                if speed:
+                    wait = (tick['t'] - first) / 1000 / speed - (time.monotonic() - start)
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                symbol = tick['s'].lower()
+                await ws.send(json.dumps({"stream": f"{symbol}@ticker", "data": {
+                    "e": "24hrTicker", "E": time.time() * 1000, "s": symbol.upper(), "c": str(tick['c'])}}))
+            await ws.close()
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+    return await websockets.serve(handler, host, port, max_queue=None)
+
+def benchmark_rules(ticks):
+    """Crossing and move rules around each symbol's first price"""
+    coins = {v: k for k, v in BINANCE_SYMBOLS.items()}
+    rules = []
+    for symbol in sorted({tick['s'].lower() for tick in ticks}):
+        coin = coins.get(symbol, symbol)
+        base = next(float(t['c']) for t in ticks if t['s'].lower() == symbol)
+        rules += [{"coin": coin, "cross": base * (1 + k / 100), "hysteresis": base / 1000} for k in range(-5, 6)]
+        rules += [{"coin": coin, "move": m, "window": 60} for m in (1, 2, 5)]
+    return rules
+
+async def benchmark_stream(ticks, paced=2000):
+    """
+    Replay ticks through a local server into the alert engine: first all of
+    them unpaced (throughput), then the first `paced` at 10x recorded speed
+    (latency without a backlog). Ticks are recorded to a throwaway price
+    history, as in --stream.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, sample, speed in (('unpaced', ticks, 0), ('paced', ticks[:paced], 10)):
+            history = PriceHistory(os.path.join(tmp, f"{label}.db"), buffered=True)
+            server = await start_replay_server(sample, port=0, speed=speed)
+            port = next(iter(server.sockets)).getsockname()[1]
+            stats = StreamStats()
+            await stream_alerts(AlertEngine(benchmark_rules(sample), history), f"ws://127.0.0.1:{port}/stream",
+                                stats=stats, stop_on_close=True, quiet=True)
+            server.close()
+            await server.wait_closed()
+            history.close()
+            print(f"— {label}")
+            stats.report()
+
+def run_stream(engine, url, record_path, dispatcher=None):
+    stats = StreamStats()
+    record = open(record_path, 'a', buffering=1) if record_path else None
+    try:
+        asyncio.run(stream_alerts(engine, url, record, stats, dispatcher=dispatcher))
+    finally:
+        if record:
+            record.close()
+        stats.report()
+
+def serve_replay(path, port, speed):
+    async def run():
+        await start_replay_server(load_ticks(path), '127.0.0.1', port, speed)
+        print(f"📼 Replaying {path} on ws://127.0.0.1:{port} (speed {speed:g}x)")
+        await asyncio.Future()
+
+    asyncio.run(run())
 
 def main():
     parser = argparse.ArgumentParser(description='Crypto Price Alert')
     parser.add_argument('--coin', default='bitcoin', help='Coin ID (e.g., bitcoin, ethereum)')
     parser.add_argument('--above', type=float, help='Alert when price goes above')
     parser.add_argument('--below', type=float, help='Alert when price goes below')
-    parser.add_argument('--interval', type=int, default=60, help='Check interval in seconds')
+    parser.add_argument('--rules', help='Rules file (JSON or YAML) with alerts for many coins')
+    parser.add_argument('--interval', type=int, default=60, help='Check interval in seconds (when far from thresholds)')
+    parser.add_argument('--min-interval', type=float, default=MIN_INTERVAL,
+                        help=f'Fastest check interval near a threshold (default: {MIN_INTERVAL})')
+    parser.add_argument('--rate-limit', type=float, default=RATE_LIMIT,
+                        help=f'Max API calls per minute (default: {RATE_LIMIT})')
     parser.add_argument('--watch', action='store_true', help='Keep watching continuously')
+    parser.add_argument('--stream', action='store_true', help='Evaluate alerts on every WebSocket tick')
+    parser.add_argument('--stream-url', help='WebSocket URL (default: Binance; or a --replay-server)')
+    parser.add_argument('--record', help='Append received ticks to this file (JSON lines)')
+    parser.add_argument('--replay-server', metavar='TICKS', help='Serve a recorded tick file over WebSocket')
+    parser.add_argument('--port', type=int, default=8765, help='Replay server port')
+    parser.add_argument('--speed', type=float, default=1.0, help='Replay speed factor (0 = no delays)')
+    parser.add_argument('--notify', action='append', default=[], metavar='SINK',
+                        help='Deliver alerts: webhook=URL, telegram=TOKEN@CHAT, smtp=HOST:PORT/TO, file=PATH')
+    parser.add_argument('--cooldown', type=float, default=COOLDOWN,
+                        help=f'Seconds before the same alert is delivered again (default: {COOLDOWN})')
+    parser.add_argument('--test-delivery', action='store_true',
+                        help='Send sample alerts to local HTTP/SMTP stand-ins and exit')
+    parser.add_argument('--benchmark-stream', nargs='?', const='', metavar='TICKS',
+                        help='Benchmark streaming alerts against a local replay server')
+    parser.add_argument('--history-db', default=DEFAULT_DB, help=f'Price history store (default: {DEFAULT_DB})')
+    parser.add_argument('--no-history', action='store_true', help='Do not record or read price history')
     
     args = parser.parse_args()
     
-    if args.watch:
-        print(f"👀 Watching {args.coin}... Press Ctrl+C to stop")
+    streaming = args.stream or args.replay_server or args.benchmark_stream is not None
+    if streaming and websockets is None:
+        print("❌ Streaming needs websockets: pip install websockets")
+        sys.exit(1)
+    
+    if args.test_delivery:
+        test_delivery()
+        return
+    
+    dispatcher = None
+    if args.notify:
+        dispatcher = AlertDispatcher([parse_sink(spec) for spec in args.notify], args.cooldown)
+    
+    history = None
+    if not args.no_history and not args.replay_server and args.benchmark_stream is None:
+        # Streaming writes go through a background thread, off the event loop
+        history = PriceHistory(args.history_db, buffered=args.stream)
+    
+    if args.benchmark_stream is not None:
+        ticks = load_ticks(args.benchmark_stream) if args.benchmark_stream else synthetic_ticks()
+        asyncio.run(benchmark_stream(ticks))
+    elif args.replay_server:
         try:
-            while True:
-                check_alerts(args.coin, args.above, args.below)
-                time.sleep(args.interval)
+            serve_replay(args.replay_server, args.port, args.speed)
         except KeyboardInterrupt:
             print("\n👋 Stopped")
+    elif args.stream:
+        if args.rules:
+            rules = load_rules(args.rules)
+        else:
+            rules = [{"coin": args.coin, key: value}
+                     for key, value in (('above', args.above), ('below', args.below)) if value]
+        if not args.stream_url:
+            # Binance only streams the symbols it lists; other coins' rules would never fire
+            unmapped = sorted({rule['coin'] for rule in rules} - set(BINANCE_SYMBOLS))
+            if unmapped:
+                print(f"⚠️ No Binance symbol for {', '.join(unmapped)}; skipping their rules "
+                      f"(use --watch to poll CoinGecko instead)")
+                rules = [rule for rule in rules if rule['coin'] in BINANCE_SYMBOLS]
+            if not rules:
+                print("❌ No rules left to stream")
+                sys.exit(1)
+        print(f"👀 Streaming {len(rules)} rules... Press Ctrl+C to stop")
+        try:
+            run_stream(AlertEngine(rules, history), args.stream_url, args.record, dispatcher)
+        except KeyboardInterrupt:
+            print("\n👋 Stopped")
+    elif args.watch:
+        scheduler = PollScheduler(args.interval, args.min_interval, TokenBucket(args.rate_limit))
+        try:
+            if args.rules:
+                run_rules(AlertEngine(load_rules(args.rules), history), scheduler, dispatcher)
+            else:
+                print(f"👀 Watching {args.coin}... Press Ctrl+C to stop")
+                thresholds = [t for t in (args.above, args.below) if t]
+                scheduler.run(lambda: nearest(check_alerts(args.coin, args.above, args.below, dispatcher,
+                                                           history), thresholds))
+        except KeyboardInterrupt:
+            print("\n👋 Stopped")
+            scheduler.stats.report()
     else:
-        check_alerts(args.coin, args.above, args.below)
+        try:
+            if args.rules:
+                run_rules(AlertEngine(load_rules(args.rules), history), dispatcher=dispatcher)
+            else:
+                check_alerts(args.coin, args.above, args.below, dispatcher, history)
+        except RateLimited as e:
+            print(f"⏳ CoinGecko {e}")
+    
+    if dispatcher:
+        dispatcher.close()
+    if history:
+        history.close()
 
 if __name__ == '__main__':
     main()
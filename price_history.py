@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Price History - Local time-series store for crypto prices
+Usage: python3 price_history.py bitcoin [--days 30]
+       python3 price_history.py --benchmark
+
+Ticks recorded by price_alert.py and tools/crypto_price.py go into one SQLite
+file (~/.crypto_prices.db, or $PRICE_HISTORY_DB). Raw ticks and 1m/1h/1d
+OHLC rollups live in WITHOUT ROWID tables clustered on (coin, time), so a
+range query over months is a single index range scan.
+"""
+
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import threading
+
+DEFAULT_DB = os.environ.get('PRICE_HISTORY_DB', os.path.expanduser("~/.crypto_prices.db"))
+
+MINUTE, HOUR, DAY = 60, 3600, 86400
+RESOLUTIONS = (MINUTE, HOUR, DAY)
+
+# Raw ticks are kept for 30 days; rollups forever. Each coin's old ticks are
+# pruned through the (coin, ts) key when it is written, at most once per interval.
+RAW_RETENTION = 30 * DAY
+PRUNE_INTERVAL = HOUR
+
+# Buffered mode (streaming): ticks are written by a background thread this often
+FLUSH_INTERVAL = 1.0
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ticks (
+    coin  TEXT NOT NULL,
+    ts    INTEGER NOT NULL,  -- unix seconds
+    price REAL NOT NULL,
+    PRIMARY KEY (coin, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollups (
+    coin   TEXT NOT NULL,
+    res    INTEGER NOT NULL,  -- bucket size in seconds
+    bucket INTEGER NOT NULL,  -- bucket start, unix seconds
+    open   REAL NOT NULL,
+    high   REAL NOT NULL,
+    low    REAL NOT NULL,
+    close  REAL NOT NULL,
+    count  INTEGER NOT NULL,
+    PRIMARY KEY (coin, res, bucket)
+) WITHOUT ROWID;
+"""
+
+# Ticks arrive in time order, so the incoming price is always the new close
+UPSERT_ROLLUP = """
+INSERT INTO rollups (coin, res, bucket, open, high, low, close, count)
+VALUES (?, ?, ?, ?, ?, ?, ?, 1)
+ON CONFLICT (coin, res, bucket) DO UPDATE SET
+    high = max(high, excluded.high),
+    low = min(low, excluded.low),
+    close = excluded.close,
+    count = count + 1
+"""
+
+class PriceHistory:
+    """
+    Append ticks and query ranges, raw or rolled up. With buffered=True,
+    record() only queues the ticks and a background thread commits them every
+    FLUSH_INTERVAL, so a streaming caller never waits on SQLite.
+    """
+
+    def __init__(self, path=DEFAULT_DB, buffered=False):
+        self.db = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(SCHEMA)
+        self.lock = threading.Lock()         # the connection
+        self.buffer_lock = threading.Lock()  # the buffer only, so record() never waits on SQLite
+        self.pruned = {}  # coin -> last prune, unix seconds
+        self.buffer = []
+        self.flusher = None
+        if buffered:
+            self.stopping = threading.Event()
+            self.flusher = threading.Thread(target=self._flush_loop, daemon=True)
+            self.flusher.start()
+
+    def record(self, prices, ts=None):
+        """Store {coin: price} observed at ts (default: now)"""
+        ticks = [(coin, price, ts) for coin, price in prices.items()]
+        if self.flusher:
+            with self.buffer_lock:
+                self.buffer += ticks
+        else:
+            self.record_many(ticks)
+
+    def record_many(self, ticks):
+        """Store [(coin, price, ts)] in one transaction"""
+        now = int(time.time())
+        rows = [(coin, int(ts if ts is not None else now), float(price))
+                for coin, price, ts in ticks if price is not None]
+        prune = [(coin, now - RAW_RETENTION) for coin in {row[0] for row in rows}
+                 if now - self.pruned.get(coin, 0) >= PRUNE_INTERVAL]
+        with self.lock, self.db:
+            # The first tick of a second wins; later ones in that second are
+            # dropped from the rollups too, so both tables count the same ticks
+            insert = self.db.cursor()
+            stored = []
+            for row in rows:
+                insert.execute('INSERT OR IGNORE INTO ticks (coin, ts, price) VALUES (?, ?, ?)', row)
+                if insert.rowcount:
+                    stored.append(row)
+            self.db.executemany(UPSERT_ROLLUP, [
+                (coin, res, ts - ts % res, price, price, price, price)
+                for coin, ts, price in stored for res in RESOLUTIONS])
+            # Range delete on the primary key: only the expired rows are visited
+            self.db.executemany('DELETE FROM ticks WHERE coin = ? AND ts < ?', prune)
+        for coin, _ in prune:
+            self.pruned[coin] = now
+
+    def flush(self):
+        """Write buffered ticks now"""
+        with self.buffer_lock:
+            ticks, self.buffer = self.buffer, []
+        if ticks:
+            self.record_many(ticks)
+
+    def _flush_loop(self):
+        while not self.stopping.wait(FLUSH_INTERVAL):
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                print(f"⚠️ Price history write failed: {e}")
+
+    def series(self, coin, start, end=None, resolution=None):
+        """
+        [(ts, price)] for start <= ts <= end. resolution None returns raw
+        ticks, otherwise the close of each MINUTE/HOUR/DAY bucket.
+        """
+        end = int(time.time()) if end is None else end
+        with self.lock:
+            if resolution is None:
+                return self.db.execute(
+                    'SELECT ts, price FROM ticks WHERE coin = ? AND ts BETWEEN ? AND ? ORDER BY ts',
+                    (coin, start, end)).fetchall()
+            return self.db.execute(
+                'SELECT bucket, close FROM rollups WHERE coin = ? AND res = ? AND bucket BETWEEN ? AND ? '
+                'ORDER BY bucket', (coin, resolution, start - start % resolution, end)).fetchall()
+
+    def ohlc(self, coin, start, end=None, resolution=HOUR):
+        """[(bucket, open, high, low, close, count)] for the range"""
+        end = int(time.time()) if end is None else end
+        with self.lock:
+            return self.db.execute(
+                'SELECT bucket, open, high, low, close, count FROM rollups '
+                'WHERE coin = ? AND res = ? AND bucket BETWEEN ? AND ? ORDER BY bucket',
+                (coin, resolution, start - start % resolution, end)).fetchall()
+
+    def price_at(self, coin, ts):
+        """Last known price at or before ts, or None"""
+        with self.lock:
+            row = self.db.execute(
+                'SELECT price FROM ticks WHERE coin = ? AND ts <= ? ORDER BY ts DESC LIMIT 1',
+                (coin, ts)).fetchone()
+        return row[0] if row else None
+
+    def close(self):
+        if self.flusher:
+            self.stopping.set()
+            self.flusher.join()
+            self.flush()
+        self.db.close()
+
+def sparkline(values, width=24):
+    """Render values as a unicode sparkline, resampled to at most width chars"""
+    if not values:
+        return ""
+    if len(values) > width:
+        step = len(values) / width
+        values = [values[min(int((i + 1) * step) - 1, len(values) - 1)] for i in range(width)]
+    low, high = min(values), max(values)
+    span = (high - low) or 1
+    return ''.join(SPARK_CHARS[int((v - low) / span * (len(SPARK_CHARS) - 1))] for v in values)
+
+def benchmark(path=":memory:", days=90):
+    """Fill `days` of 1-minute ticks for one coin and time range queries"""
+    history = PriceHistory(path)
+    now = int(time.time())
+    start = now - days * DAY
+    rng = random.Random(42)
+    price = 60000.0
+    ticks = []
+    for ts in range(start, now, MINUTE):
+        price *= 1 + rng.gauss(0, 0.0005)
+        ticks.append(('bitcoin', price, ts))
+
+    t = time.perf_counter()
+    history.record_many(ticks)
+    elapsed = time.perf_counter() - t
+    print(f"📊 {len(ticks):,} ticks ({days} days of 1m data) inserted in {elapsed:.2f}s")
+
+    for label, query in (
+            ("raw, last 24h", lambda: history.series('bitcoin', now - DAY)),
+            ("1h, last 30 days", lambda: history.series('bitcoin', now - 30 * DAY, resolution=HOUR)),
+            ("1d, all", lambda: history.series('bitcoin', start, resolution=DAY)),
+            ("1m, all", lambda: history.series('bitcoin', start, resolution=MINUTE)),
+            ("price 7 days ago", lambda: [history.price_at('bitcoin', now - 7 * DAY)])):
+        t = time.perf_counter()
+        rows = query()
+        elapsed = (time.perf_counter() - t) * 1000
+        print(f"   {label:<18} {len(rows):>7,} rows  {elapsed:8.2f} ms")
+    history.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Show recorded price history')
+    parser.add_argument('coin', nargs='?', default='bitcoin', help='Coin ID (e.g., bitcoin)')
+    parser.add_argument('--days', type=int, default=7, help='Days to show (default: 7)')
+    parser.add_argument('--db', default=DEFAULT_DB, help='History database')
+    parser.add_argument('--benchmark', action='store_true', help='Benchmark inserts and range queries')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark()
+        return
+
+    if not os.path.exists(args.db):
+        print(f"❌ No history yet ({args.db})")
+        sys.exit(1)
+
+    history = PriceHistory(args.db)
+    resolution = HOUR if args.days <= 14 else DAY
+    rows = history.ohlc(args.coin, int(time.time()) - args.days * DAY, resolution=resolution)
+    history.close()
+    if not rows:
+        print(f"❌ No history for {args.coin}")
+        sys.exit(1)
+
+    closes = [row[4] for row in rows]
+    first, last = rows[0][1], closes[-1]
+    print(f"📈 {args.coin} - last {args.days} days ({len(rows)} {'hourly' if resolution == HOUR else 'daily'} points)")
+    print(f"   {sparkline(closes, 48)}")
+    print(f"   low ${min(row[3] for row in rows):,.2f}  high ${max(row[2] for row in rows):,.2f}"
+          f"  now ${last:,.2f}  ({(last / first - 1) * 100:+.2f}%)")
+
+if __name__ == '__main__':
+    main()
@@ -2,61 +2,158 @@
 """
 Screenshot Organizer - Auto-renames and organizes screenshots
 Usage: python3 screenshot_organizer.py [directory]
+       python3 screenshot_organizer.py --benchmark
 """
 
 import os
-import sys
+import re
+import time
+import random
+import argparse
 from pathlib import Path
 from datetime import datetime
 
+# Keyword first, then the date and time anchored right after it. Covers macOS
+# "Screenshot 2026-02-19 at 10.04.05 AM", "Screen Shot 2020-01-05 at 3.04.05 PM",
+# Windows "Screenshot 2026-02-19 100405", GNOME "Screenshot from 2026-02-19 10-04-05",
+# KDE/Android "Screenshot_20260219_100405" and Chinese "截圖 2026-02-19 下午3.04.05".
+# Case is spelled out in character classes: IGNORECASE makes every name scan slower.
+SCREENSHOT_KEYWORD_RE = re.compile(
+    r"[Ss][Cc][Rr][Ee][Ee][Nn][ _]?[Ss][Hh][Oo][Tt]|螢幕截圖|屏幕截图|截圖|截图|截屏")
+SCREENSHOT_DATE_RE = re.compile(r"""
+    (?:[ _-]*[Ff][Rr][Oo][Mm])?[ _-]*
+    (\d{4})-?(\d{2})-?(\d{2})
+    (?:[ _-]*[Aa][Tt])?[ _-]*
+    (上午|下午)?
+    (\d{1,2})[.:-]?(\d{2})[.:-]?(\d{2})
+    (?:[ \u202f]?([AaPp])[Mm])?
+""", re.VERBOSE)
+
+# 12-hour clock hours to 24-hour strings, e.g. AM '12' -> '00', PM '3' or '03' -> '15'
+AM_HOURS = {key: f"{h % 12:02d}" for h in range(1, 13) for key in (str(h), f"{h:02d}")}
+PM_HOURS = {key: f"{h % 12 + 12:02d}" for h in range(1, 13) for key in (str(h), f"{h:02d}")}
+
+# Only images go to Screenshots_Unsorted; "Screenshots.zip" and the like stay put
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.heic', '.gif', '.bmp', '.webp', '.tif', '.tiff'}
+
+def parse_screenshot_name(name):
+    """Return None if name is not a screenshot, '' if it is one without a usable
+    date, else the 'YYYYMMDD_HHMMSS' timestamp"""
+    keyword = SCREENSHOT_KEYWORD_RE.search(name)
+    if keyword is None:
+        return None
+    m = SCREENSHOT_DATE_RE.match(name, keyword.end())
+    if m is None:
+        return ''
+    y, mo, d, cn, h, mi, s, ampm = m.groups()
+
+    # Everything is checked and joined as strings; no int() or strptime per name
+    if cn or ampm:
+        pm = cn == '下午' or ampm == 'p' or ampm == 'P'
+        hours = PM_HOURS if pm else AM_HOURS
+        h = hours[h] if h in hours else f"{int(h) % 12 + (12 if pm else 0):02d}"
+    elif len(h) == 1:
+        h = '0' + h
+    if not ('01' <= mo <= '12' and '01' <= d <= '31' and h < '24' and mi < '60' and s < '60'):
+        return ''
+    return y + mo + d + '_' + h + mi + s
+
+def _parse_name_legacy(name):
+    """Previous any() + split() + strptime() parser, kept for benchmarking"""
+    patterns = ['Screenshot', 'Screen Shot', 'screenshot', '截圖']
+    if not any(p in name for p in patterns):
+        return None
+    try:
+        parts = name.split()
+        if 'at' in parts:
+            date_part = parts[1] + ' ' + parts[2] + ' ' + parts[3]
+            return datetime.strptime(date_part, '%Y-%m-%d %H.%M.%S %p')
+    except Exception:
+        return ''
+    return ''
+
+def benchmark_corpus(count=200_000, seed=42):
+    """Synthetic mix of screenshot names in every supported format plus ordinary files"""
+    rng = random.Random(seed)
+    formats = [
+        "Screenshot {y}-{mo}-{d} at {h12}.{mi}.{s} {ap}.png",
+        "Screen Shot {y}-{mo}-{d} at {h12}.{mi}.{s} {ap}.png",
+        "Screenshot {y}-{mo}-{d} {h}{mi}{s}.png",
+        "Screenshot from {y}-{mo}-{d} {h}-{mi}-{s}.png",
+        "Screenshot_{y}{mo}{d}_{h}{mi}{s}.png",
+        "截圖 {y}-{mo}-{d} {cn}{h12}.{mi}.{s}.png",
+        "Screenshot ({n}).png",
+        "IMG_{n}.jpg",
+        "report-{y}-{mo}.pdf",
+    ]
+    names = []
+    for n in range(count):
+        h = rng.randrange(24)
+        names.append(rng.choice(formats).format(
+            y=rng.randrange(2015, 2027), mo=f"{rng.randrange(1, 13):02d}", d=f"{rng.randrange(1, 29):02d}",
+            h=f"{h:02d}", h12=h % 12 or 12, mi=f"{rng.randrange(60):02d}", s=f"{rng.randrange(60):02d}",
+            ap='PM' if h >= 12 else 'AM', cn='下午' if h >= 12 else '上午', n=n))
+    return names
+
+def benchmark(count=200_000):
+    """Compare name-parsing throughput against the previous parser"""
+    names = benchmark_corpus(count)
+    print(f"📊 Parsing {count:,} synthetic file names")
+    for label, parse in (('legacy', _parse_name_legacy), ('regex', parse_screenshot_name)):
+        start = time.perf_counter()
+        parsed = sum(1 for name in names if parse(name))
+        elapsed = time.perf_counter() - start
+        print(f"   {label:<7} {count / elapsed:>12,.0f} names/sec, {parsed:,} dated")
+
 def organize_screenshots(directory='.'):
     """Organize screenshots by date and app"""
     directory = Path(directory)
-    
+
     if not directory.exists():
         print(f"Error: Directory '{directory}' does not exist")
         return
-    
-    # Screenshots usually have these patterns
-    patterns = ['Screenshot', 'Screen Shot', 'screenshot', '截圖']
-    
+
     count = 0
-    for item in directory.iterdir():
-        if item.is_file():
-            name = item.name
-            
-            # Check if it's a screenshot
-            if any(p in name for p in patterns):
-                # Extract date from filename
-                # Format: Screenshot 2026-02-19 at 10.04.05 AM.png
-                try:
-                    # Try to parse the date
-                    parts = name.split()
-                    if 'at' in parts:
-                        date_part = parts[1] + ' ' + parts[2] + ' ' + parts[3]
-                        dt = datetime.strptime(date_part, '%Y-%m-%d %H.%M.%S %p')
-                        
-                        # Create folder by date
-                        folder = directory / f"Screenshots_{dt.strftime('%Y-%m')}"
-                        folder.mkdir(exist_ok=True)
-                        
-                        # New name with date prefix
-                        new_name = f"{dt.strftime('%Y%m%d_%H%M%S')}_{item.name}"
-                        new_path = folder / new_name
-                        
-                        item.rename(new_path)
-                        print(f"✓ {item.name} → {folder.name}/{new_name}")
-                        count += 1
-                except Exception as e:
-                    # Just move to unsorted
-                    folder = directory / "Screenshots_Unsorted"
-                    folder.mkdir(exist_ok=True)
-                    new_path = folder / item.name
-                    item.rename(new_path)
-                    print(f"? {item.name} → {folder.name}/ (unsorted)")
-    
+    created = set()
+    with os.scandir(directory) as it:
+        entries = [entry for entry in it if entry.is_file()]
+
+    for entry in entries:
+        name = entry.name
+        stamp = parse_screenshot_name(name)
+        if stamp is None:
+            continue
+
+        if stamp:
+            # Create folder by date
+            folder = directory / f"Screenshots_{stamp[:4]}-{stamp[4:6]}"
+            if folder not in created:
+                folder.mkdir(exist_ok=True)
+                created.add(folder)
+
+            # New name with date prefix
+            new_name = f"{stamp}_{name}"
+            os.rename(entry.path, folder / new_name)
+            print(f"✓ {name} → {folder.name}/{new_name}")
+            count += 1
+        elif os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+            # Just move to unsorted
+            folder = directory / "Screenshots_Unsorted"
+            if folder not in created:
+                folder.mkdir(exist_ok=True)
+                created.add(folder)
+            os.rename(entry.path, folder / name)
+            print(f"? {name} → {folder.name}/ (unsorted)")
+
     print(f"\n✅ Done! Organized {count} screenshots")
 
 if __name__ == '__main__':
-    target = sys.argv[1] if len(sys.argv) > 1 else '.'
-    organize_screenshots(target)
+    parser = argparse.ArgumentParser(description='Organize screenshots by date')
+    parser.add_argument('directory', nargs='?', default='.', help='Directory to organize')
+    parser.add_argument('--benchmark', action='store_true', help='Benchmark name parsing and exit')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark()
+    else:
+        organize_screenshots(args.directory)
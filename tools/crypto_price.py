@@ -5,13 +5,24 @@ Usage: python3 crypto_price.py [coin1,coin2,...]
 Examples:
   python3 crypto_price.py btc,eth,sol
   python3 crypto_price.py btc,eth,sol,avax,dogecoin
+
+Prices are saved to the shared history store (../price_history.py); the
+sparkline shows the last 24h of hourly closes from that store.
 """
 
 import requests
 import sys
 import os
+import time
 from datetime import datetime
 
+# Shared price history store lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+try:
+    from price_history import PriceHistory, sparkline, DAY, HOUR
+except ImportError:
+    PriceHistory = None
+
 # CoinGecko API
 CG_API = "https://api.coingecko.com/api/v3"
 
@@ -70,11 +81,17 @@ def main():
         sys.exit(1)
     
     # Sort by market cap (just use the order)
+    history = None
+    if PriceHistory:
+        history = PriceHistory()
+        history.record({coin: data["usd"] for coin, data in prices.items() if "usd" in data})
+    
     print(f"💹 Crypto Prices - {datetime.now().strftime('%H:%M:%S')}")
-    print("=" * 55)
-    print(f"{'Coin':<12} {'Price (USD)':>14} {'24h':>10} {'Trend'}")
-    print("-" * 55)
+    print("=" * 80)
+    print(f"{'Coin':<12} {'Price (USD)':>14} {'24h':>10} {'Trend':<6} {'24h history'}")
+    print("-" * 80)
     
+    since = int(time.time()) - DAY if history else 0
     for coin in coins:
         if coin in prices:
             data = prices[coin]
@@ -83,11 +100,17 @@ def main():
             emoji = get_emoji(change)
             # Pretty name
             name = coin.title().replace("-", " ")[:12]
-            print(f"{name:<12} ${format_num(price):>13} {change:>+9.2f}% {emoji}")
+            spark = ""
+            if history:
+                closes = [close for _, close in history.series(coin, since, resolution=HOUR)]
+                spark = sparkline(closes) if len(closes) > 1 else ""
+            print(f"{name:<12} ${format_num(price):>13} {change:>+9.2f}% {emoji:<5} {spark}")
         else:
             print(f"{coin:<12} NOT FOUND")
     
-    print("=" * 55)
+    print("=" * 80)
+    if history:
+        history.close()
 
 if __name__ == "__main__":
     main()
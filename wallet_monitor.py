@@ -5,12 +5,29 @@ Usage: python3 wallet_monitor.py <address> [chain:address2] ...
 Examples: 
   python3 wallet_monitor.py 0x742d35Cc6634C0532925a3b844Bc9e7595f
   python3 wallet_monitor.py eth:0x742d35Cc6634C0532925a3b844Bc9e7595f btc:bc1qxy2kgdygjrsqtzq2n0yrf2493p83kkfjhx0wlh
+  python3 wallet_monitor.py --tokens eth:0x742d35Cc6634C0532925a3b844Bc9e7595f
+  python3 wallet_monitor.py --watch eth:0x742d... --cold eth:0x1234...
+  python3 wallet_monitor.py --benchmark
 """
 
 import requests
+import os
 import sys
-from datetime import datetime
 import json
+import time
+import argparse
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None
 
 # RPC endpoints (free tier)
 RPCS = {
@@ -38,21 +55,258 @@ CG_IDS = {
     "btc": "bitcoin",
 }
 
-# Cache prices for 5 minutes
-_price_cache = {"prices": {}, "timestamp": 0}
+# Prices are cached per coin in a file shared by every process (cron jobs
+# share one CoinGecko quota). Fresh for 5 minutes; stale entries up to an hour
+# old are served immediately while a background refresh runs.
+PRICE_CACHE = os.path.expanduser("~/.wallet_monitor_prices.json")
 CACHE_DURATION = 300  # 5 minutes
+STALE_DURATION = 3600
 
-def get_eth_balance(address, rpc):
-    """Get ETH/ERC20 balance via RPC"""
+# HTTP settings: one keep-alive session per host, capped concurrency per host
+# (free-tier RPCs rate-limit aggressively)
+TIMEOUT = 10
+PER_HOST_LIMIT = 4
+DEFAULT_WORKERS = 16
+
+# JSON-RPC batch size for eth_getBalance (some free RPCs reject large batches)
+BATCH_SIZE = 50
+
+# Multicall3 is deployed at the same address on most EVM chains
+MULTICALL3 = "0xcA11bde05977b3631167028862bE2a173976CA11"
+MULTICALL_CHUNK = 1000
+SEL_AGGREGATE3 = "82ad56cb"       # aggregate3((address,bool,bytes)[])
+SEL_GET_ETH_BALANCE = "4d2301cc"  # getEthBalance(address)
+SEL_BALANCE_OF = "70a08231"       # balanceOf(address)
+SEL_DECIMALS = "313ce567"         # decimals()
+SEL_SYMBOL = "95d89b41"           # symbol()
+
+# ERC-20 tokens scanned with --tokens: {chain: {contract: CoinGecko ID}}
+# Override with --tokens-file (same JSON shape, or {chain: [contract, ...]})
+DEFAULT_TOKENS = {
+    "eth": {
+        "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48": "usd-coin",
+        "0xdAC17F958D2ee523a2206206994597C13D831ec7": "tether",
+        "0x6B175474E89094C44Da98b954EedeAC495271d0F": "dai",
+    },
+    "bsc": {
+        "0x55d398326f99059fF775485246999027B3197955": "tether",
+    },
+    "polygon": {
+        "0x3c499c542cEF5E3811e1192ce70d8cC03d5c3359": "usd-coin",
+    },
+    "arbitrum": {
+        "0xaf88d065e77c8cC2239327C5EDb3A432268e5831": "usd-coin",
+    },
+    "optimism": {
+        "0x0b2C639c533813f4Aa9D7837CAf62653d097Ff85": "usd-coin",
+    },
+}
+
+# Token decimals/symbol never change, so they are cached on disk for good
+TOKEN_CACHE = os.path.expanduser("~/.wallet_monitor_tokens.json")
+
+_sessions = {}
+_host_slots = {}
+_sessions_lock = threading.Lock()
+
+# Watch mode: hot wallets are checked every HOT_INTERVAL, cold ones every
+# COLD_INTERVAL, and balances are only re-read when the chain has a new block
+HOT_INTERVAL = 15
+COLD_INTERVAL = 600
+STATS_INTERVAL = 300
+
+class RpcStats:
+    """Counts JSON-RPC HTTP requests and calls per endpoint"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.requests = {}
+        self.calls = {}
+
+    def record(self, rpc, calls=1):
+        with self.lock:
+            self.requests[rpc] = self.requests.get(rpc, 0) + 1
+            self.calls[rpc] = self.calls.get(rpc, 0) + calls
+
+    def rates(self):
+        """Return {rpc: (requests/min, calls/min, total calls)} since start"""
+        minutes = max(time.monotonic() - self.started, 1) / 60
+        with self.lock:
+            return {rpc: (self.requests[rpc] / minutes, self.calls[rpc] / minutes, self.calls[rpc])
+                    for rpc in self.requests}
+
+rpc_stats = RpcStats()
+
+def get_session(url):
+    """Get the shared session and concurrency slot for the URL's host"""
+    host = urlsplit(url).netloc
+    with _sessions_lock:
+        if host not in _sessions:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=PER_HOST_LIMIT)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _sessions[host] = session
+            _host_slots[host] = threading.BoundedSemaphore(PER_HOST_LIMIT)
+        return _sessions[host], _host_slots[host]
+
+def http_request(method, url, **kwargs):
+    """Send a request over the host's pooled connection"""
+    session, slot = get_session(url)
+    with slot:
+        return session.request(method, url, timeout=TIMEOUT, **kwargs)
+
+def rpc_call(rpc, method, params):
+    """Send one JSON-RPC request and return the decoded response"""
     payload = {
         "jsonrpc": "2.0",
-        "method": "eth_getBalance",
-        "params": [address, "latest"],
+        "method": method,
+        "params": params,
         "id": 1
     }
+    rpc_stats.record(rpc)
+    return http_request('POST', rpc, json=payload).json()
+
+def rpc_batch(rpc, calls):
+    """
+    Send calls [(method, params)] as one JSON-RPC batch.
+    Returns one response dict per call, in call order, matched by id;
+    failed or missing elements come back as {"error": ...}
+    """
+    payload = [{"jsonrpc": "2.0", "method": method, "params": params, "id": i}
+               for i, (method, params) in enumerate(calls)]
+    rpc_stats.record(rpc, len(calls))
+    data = http_request('POST', rpc, json=payload).json()
+    if not isinstance(data, list):
+        # The whole batch was rejected (e.g. batch too large)
+        error = data.get('error', 'Batch rejected') if isinstance(data, dict) else 'Bad response'
+        return [{"error": error}] * len(calls)
+    by_id = {item.get('id'): item for item in data if isinstance(item, dict)}
+    return [by_id.get(i, {"error": "Missing response"}) for i in range(len(calls))]
+
+def _rpc_error(item):
+    error = item.get('error', 'Unknown error')
+    if isinstance(error, dict):
+        error = error.get('message', error)
+    return f"Error: {str(error)[:30]}"
+
+def get_eth_balances(addresses, rpc):
+    """Get native balances for many addresses in one batch request"""
     try:
-        response = requests.post(rpc, json=payload, timeout=10)
-        data = response.json()
+        items = rpc_batch(rpc, [("eth_getBalance", [address, "latest"]) for address in addresses])
+    except Exception as e:
+        return [f"Error: {str(e)[:30]}"] * len(addresses)
+    balances = []
+    for item in items:
+        try:
+            balances.append(int(item['result'], 16) / 1e18)
+        except (KeyError, TypeError, ValueError):
+            balances.append(_rpc_error(item))
+    return balances
+
+def _word(value):
+    return f"{value:064x}"
+
+def encode_aggregate3(calls):
+    """ABI-encode Multicall3.aggregate3 for calls [(target, calldata hex)], failures allowed"""
+    n = len(calls)
+    head = [_word(0x20), _word(n)]
+    body = []
+    offset = n * 32
+    for target, calldata in calls:
+        padded = calldata.ljust(-(-len(calldata) // 64) * 64, '0')
+        head.append(_word(offset))
+        body += [_word(int(target, 16)), _word(1), _word(0x60), _word(len(calldata) // 2), padded]
+        offset += 4 * 32 + len(padded) // 2
+    return "0x" + SEL_AGGREGATE3 + ''.join(head + body)
+
+def decode_aggregate3(result):
+    """
+    Decode aggregate3's (bool success, bytes returnData)[] into bytes, or None
+    on failure. An empty result ("0x", no contract at the target) decodes to [].
+    """
+    data = bytes.fromhex(result[2:] if result.startswith('0x') else result)
+    if not data:
+        return []
+
+    def word(offset):
+        return int.from_bytes(data[offset:offset + 32], 'big')
+
+    start = word(0)
+    n = word(start)
+    base = start + 32
+    results = []
+    for i in range(n):
+        item = base + word(base + i * 32)
+        returned = item + word(item + 32)
+        if word(item):
+            results.append(data[returned + 32:returned + 32 + word(returned)])
+        else:
+            results.append(None)
+    return results
+
+def eth_calls(rpc, calls, batch_size=BATCH_SIZE, multicall=False):
+    """
+    Run read-only calls [(target, calldata hex)] and return the raw bytes of
+    each result (None on failure), using Multicall3 or JSON-RPC batches
+    """
+    results = []
+    size = MULTICALL_CHUNK if multicall else max(batch_size, 1)
+    for start in range(0, len(calls), size):
+        chunk = calls[start:start + size]
+        try:
+            if multicall:
+                call = {"to": MULTICALL3, "data": encode_aggregate3(chunk)}
+                data = rpc_call(rpc, "eth_call", [call, "latest"])
+                decoded = decode_aggregate3(data['result']) if 'result' in data else []
+                # A short decode would shift every later result onto the wrong call
+                found = decoded if len(decoded) == len(chunk) else [None] * len(chunk)
+            else:
+                items = rpc_batch(rpc, [("eth_call", [{"to": target, "data": "0x" + calldata}, "latest"])
+                                        for target, calldata in chunk])
+                found = [bytes.fromhex(item['result'][2:]) if isinstance(item.get('result'), str) else None
+                         for item in items]
+        except Exception:
+            found = [None] * len(chunk)
+        results += found
+    return results
+
+def get_eth_balances_multicall(addresses, rpc):
+    """Get native balances for many addresses in a single eth_call to Multicall3"""
+    balances = [None] * len(addresses)
+    valid = []
+    for i, address in enumerate(addresses):
+        try:
+            int(address, 16)
+            valid.append(i)
+        except ValueError:
+            balances[i] = "Error: Invalid address"
+    if not valid:
+        return balances
+
+    calls = [(MULTICALL3, SEL_GET_ETH_BALANCE + _word(int(addresses[i], 16))) for i in valid]
+    call = {"to": MULTICALL3, "data": encode_aggregate3(calls)}
+    try:
+        data = rpc_call(rpc, "eth_call", [call, "latest"])
+        decoded = decode_aggregate3(data['result']) if 'result' in data else None
+        if decoded is None:
+            results = [_rpc_error(data)] * len(valid)
+        elif len(decoded) != len(valid):
+            results = [f"Error: Multicall3 gave {len(decoded)}/{len(valid)}"] * len(valid)
+        else:
+            results = [int.from_bytes(raw[:32], 'big') / 1e18 if raw and len(raw) >= 32 else "Error: Call failed"
+                       for raw in decoded]
+    except Exception as e:
+        results = [f"Error: {str(e)[:30]}"] * len(valid)
+    for i, balance in zip(valid, results):
+        balances[i] = balance
+    return balances
+
+def get_eth_balance(address, rpc):
+    """Get ETH/ERC20 balance via RPC"""
+    try:
+        data = rpc_call(rpc, "eth_getBalance", [address, "latest"])
         if 'result' in data:
             wei = int(data['result'], 16)
             return wei / 1e18
@@ -64,7 +318,7 @@ def get_btc_balance(address):
     """Get BTC balance via blockchain API"""
     try:
         url = f"https://blockstream.info/api/address/{address}"
-        response = requests.get(url, timeout=10)
+        response = http_request('GET', url)
         if response.status_code == 200:
             data = response.json()
             return data.get('chain_stats', {}).get('funded_txo_sum', 0) / 1e8
@@ -72,35 +326,237 @@ def get_btc_balance(address):
         return f"Error: {str(e)[:30]}"
     return None
 
+def get_sol_balance(address, rpc=RPCS["sol"]):
+    """Get SOL balance via RPC"""
+    try:
+        data = rpc_call(rpc, "getBalance", [address])
+        if 'result' in data:
+            return data['result']['value'] / 1e9
+        return f"Error: {data.get('error', 'Unknown error')}"
+    except Exception as e:
+        return f"Error: {str(e)[:30]}"
+
+def fetch_balance(chain, address, rpcs=RPCS):
+    """Fetch one wallet's balance; None for an unknown chain"""
+    if chain == 'btc':
+        return get_btc_balance(address)
+    if chain == 'sol':
+        return get_sol_balance(address, rpcs["sol"])
+    rpc = rpcs.get(chain)
+    if not rpc:
+        return None
+    return get_eth_balance(address, rpc)
+
+def fetch_balances(wallet_data, workers=DEFAULT_WORKERS, rpcs=RPCS,
+                   batch_size=BATCH_SIZE, multicall=False):
+    """
+    Fetch balances concurrently; results keep the order of wallet_data.
+    EVM addresses are grouped per chain into JSON-RPC batches of batch_size
+    (1 disables batching), or into Multicall3 calls when multicall is set.
+    """
+    jobs = []  # (indices, function returning one result per index)
+    by_chain = {}
+    for i, (chain, address) in enumerate(wallet_data):
+        if chain in ('btc', 'sol') or chain not in rpcs or batch_size <= 1 and not multicall:
+            jobs.append(([i], lambda chain=chain, address=address: [fetch_balance(chain, address, rpcs)]))
+        else:
+            by_chain.setdefault(chain, []).append(i)
+
+    fetch_many = get_eth_balances_multicall if multicall else get_eth_balances
+    size = MULTICALL_CHUNK if multicall else batch_size
+    for chain, indices in by_chain.items():
+        for start in range(0, len(indices), size):
+            chunk = indices[start:start + size]
+            addresses = [wallet_data[i][1] for i in chunk]
+            jobs.append((chunk, lambda addresses=addresses, rpc=rpcs[chain]: fetch_many(addresses, rpc)))
+
+    results = [None] * len(wallet_data)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for (indices, _), values in zip(jobs, pool.map(lambda job: job[1](), jobs)):
+            for i, value in zip(indices, values):
+                results[i] = value
+    return results
+
+def load_token_list(path=None):
+    """Load {chain: {contract: CoinGecko ID or None}} from JSON, or the defaults"""
+    if not path:
+        return DEFAULT_TOKENS
+    with open(path) as f:
+        data = json.load(f)
+    return {chain.lower(): tokens if isinstance(tokens, dict) else dict.fromkeys(tokens)
+            for chain, tokens in data.items()}
+
+def load_token_meta(path=TOKEN_CACHE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_token_meta(meta, path=TOKEN_CACHE):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(meta, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+def decode_symbol(raw):
+    """Decode symbol() as an ABI string, or bytes32 for older tokens (e.g. MKR)"""
+    if not raw:
+        return None
+    if len(raw) >= 64 and int.from_bytes(raw[:32], 'big') == 32:
+        length = int.from_bytes(raw[32:64], 'big')
+        return raw[64:64 + length].decode('utf-8', 'replace')
+    return raw[:32].rstrip(b'\x00').decode('utf-8', 'replace') or None
+
+def scan_tokens(chain, addresses, tokens, rpc, meta, batch_size=BATCH_SIZE, multicall=False):
+    """
+    Read ERC-20 balances of every address for the chain's tokens.
+    Missing decimals/symbol are fetched once and added to meta.
+    Returns {address: [(symbol, amount, CoinGecko ID)]}, non-zero balances only.
+    """
+    missing = [token for token in tokens if f"{chain}:{token.lower()}" not in meta]
+    if missing:
+        calls = [(token, selector) for token in missing for selector in (SEL_DECIMALS, SEL_SYMBOL)]
+        results = eth_calls(rpc, calls, batch_size, multicall)
+        for n, token in enumerate(missing):
+            decimals, symbol = results[2 * n], results[2 * n + 1]
+            if decimals and len(decimals) >= 32:
+                meta[f"{chain}:{token.lower()}"] = {
+                    "decimals": int.from_bytes(decimals[:32], 'big'),
+                    "symbol": decode_symbol(symbol) or token[:8],
+                }
+
+    known = [token for token in tokens if f"{chain}:{token.lower()}" in meta]
+    valid = []
+    for address in addresses:
+        try:
+            valid.append((address, _word(int(address, 16))))
+        except ValueError:
+            continue
+    calls = [(token, SEL_BALANCE_OF + arg) for _, arg in valid for token in known]
+    results = eth_calls(rpc, calls, batch_size, multicall)
+
+    holdings = {}
+    for n, (address, _) in enumerate(valid):
+        for m, token in enumerate(known):
+            raw = results[n * len(known) + m]
+            amount = int.from_bytes(raw[:32], 'big') if raw and len(raw) >= 32 else 0
+            if amount:
+                info = meta[f"{chain}:{token.lower()}"]
+                holdings.setdefault(address, []).append(
+                    (info["symbol"], amount / 10 ** info["decimals"], tokens[token]))
+    return holdings
+
+def fetch_token_balances(wallet_data, token_list, workers=DEFAULT_WORKERS, rpcs=RPCS,
+                         batch_size=BATCH_SIZE, multicall=False, meta_path=TOKEN_CACHE):
+    """Scan token balances on all chains concurrently; returns {(chain, address): holdings}"""
+    by_chain = {}
+    for chain, address in wallet_data:
+        if chain in token_list and chain in rpcs and address not in by_chain.get(chain, []):
+            by_chain.setdefault(chain, []).append(address)
+    if not by_chain:
+        return {}
+
+    meta = load_token_meta(meta_path)
+    known = len(meta)
+
+    def scan(chain):
+        try:
+            return chain, scan_tokens(chain, by_chain[chain], token_list[chain], rpcs[chain],
+                                      meta, batch_size, multicall)
+        except Exception as e:
+            print(f"⚠️ {chain.upper()} token scan error: {str(e)[:50]}")
+            return chain, {}
+
+    result = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for chain, holdings in pool.map(scan, by_chain):
+            for address, items in holdings.items():
+                result[(chain, address)] = items
+    if len(meta) != known:
+        save_token_meta(meta, meta_path)
+    return result
+
 def get_cg_id(chain):
     """Get CoinGecko ID for a chain"""
     return CG_IDS.get(chain, chain)
 
-def get_prices(chains):
-    """Get USD prices for chains (cached)"""
-    global _price_cache
-    
-    now = datetime.now().timestamp()
-    if now - _price_cache["timestamp"] < CACHE_DURATION and _price_cache["prices"]:
-        return _price_cache["prices"]
-    
-    # Fetch fresh prices
-    ids = [get_cg_id(c) for c in chains if c != 'btc']
-    ids.append('bitcoin')  # Always include BTC
-    ids = list(set(ids))  # Deduplicate
-    
+@contextmanager
+def price_cache_lock(exclusive=False):
+    """Hold a shared (read) or exclusive (write) lock on the price cache"""
+    with open(PRICE_CACHE + '.lock', 'a') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+def read_price_cache():
+    try:
+        with open(PRICE_CACHE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def write_price_cache(cache):
+    tmp = PRICE_CACHE + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(cache, f)
+    os.replace(tmp, PRICE_CACHE)
+
+def fetch_prices(ids):
+    """Fetch USD prices for CoinGecko IDs in one request; None on failure"""
     try:
-        url = f"{PRICE_API}?ids={','.join(ids)}&vs_currencies=usd"
-        response = requests.get(url, timeout=10)
+        url = f"{PRICE_API}?ids={','.join(sorted(ids))}&vs_currencies=usd"
+        response = http_request('GET', url)
         if response.status_code == 200:
-            data = response.json()
-            _price_cache["prices"] = data
-            _price_cache["timestamp"] = now
-            return data
+            return response.json()
     except Exception as e:
         print(f"⚠️ Price fetch error: {str(e)[:50]}")
+    return None
+
+def refresh_prices(ids):
+    """
+    Fetch the IDs that are still not fresh and merge them into the cache.
+    The exclusive lock is held across the request, so a process that waited
+    on it finds the prices another process just fetched and skips its own.
+    """
+    with price_cache_lock(exclusive=True):
+        cache = read_price_cache()
+        now = time.time()
+        ids = [cg_id for cg_id in ids if now - cache.get(cg_id, {}).get('t', 0) >= CACHE_DURATION]
+        if ids:
+            data = fetch_prices(ids)
+            if data is not None:
+                for cg_id in ids:
+                    # Unknown IDs are cached as None so they aren't re-requested
+                    cache[cg_id] = {"usd": data.get(cg_id, {}).get('usd'), "t": now}
+                write_price_cache(cache)
+        return cache
+
+def get_prices(chains, extra_ids=()):
+    """Get USD prices for chains and extra CoinGecko IDs (shared per-coin cache)"""
+    ids = {get_cg_id(c) for c in chains if c != 'btc'}
+    ids.add('bitcoin')  # Always include BTC
+    ids.update(extra_ids)
     
-    return {}
+    with price_cache_lock():
+        cache = read_price_cache()
+    now = time.time()
+    age = {cg_id: now - cache[cg_id]['t'] if cg_id in cache else float('inf') for cg_id in ids}
+    stale = {cg_id for cg_id in ids if age[cg_id] >= CACHE_DURATION}
+    
+    if any(age[cg_id] >= STALE_DURATION for cg_id in stale):
+        # Something is missing or too old: fetch it now, together with the stale IDs
+        cache = refresh_prices(stale)
+    elif stale:
+        # Stale-while-revalidate: answer from cache, refresh before the process exits
+        threading.Thread(target=refresh_prices, args=(stale,)).start()
+    
+    return {cg_id: {'usd': cache[cg_id]['usd']} for cg_id in ids
+            if cache.get(cg_id, {}).get('usd') is not None}
 
 def get_usd_price(chain, prices):
     """Get USD price for a chain"""
@@ -121,8 +577,239 @@ def parse_wallet(arg):
         return 'sol', arg
     return 'eth', arg
 
+def report_wallet(chain, address, balance, prices):
+    """Print one wallet line; returns its USD value"""
+    if balance is None and chain not in ('btc', 'sol') and chain not in RPCS:
+        print(f"❌ Unknown chain: {chain}")
+        return 0
+    if not isinstance(balance, float):
+        print(f"❌ {chain.upper()} {address}: {balance}")
+        return 0
+    usd_value = balance * get_usd_price(chain, prices)
+    if chain == 'btc':
+        print(f"₿  BTC {address[:8]}...{address[-6:]}: {balance:.6f} BTC  (${usd_value:,.2f})")
+    elif chain == 'sol':
+        print(f"◎  SOL {address[:8]}...{address[-4:]}: {balance:.4f} SOL  (${usd_value:,.2f})")
+    else:
+        print(f"◈  {chain.upper()} {address[:6]}...{address[-4:]}: {balance:.4f} {chain.upper()}  (${usd_value:,.2f})")
+    return usd_value
+
+def report_tokens(holdings, prices):
+    """Print a wallet's token lines; returns their USD value"""
+    total = 0
+    for symbol, amount, cg_id in holdings:
+        usd_value = amount * prices.get(cg_id, {}).get('usd', 0) if cg_id else 0
+        print(f"     ◦ {amount:,.4f} {symbol}  (${usd_value:,.2f})")
+        total += usd_value
+    return total
+
+class StubRPCHandler(BaseHTTPRequestHandler):
+    """Local JSON-RPC stub for benchmarks: every balance is 1.0 after a fixed delay"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    latency = 0.05
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        type(self).connections += 1
+
+    def answer(self, request):
+        selector = request['params'][0]['data'][2:10] if request.get('method') == 'eth_call' else None
+        if selector and selector != SEL_AGGREGATE3:
+            if selector == SEL_SYMBOL:
+                result = _word(0x20) + _word(3) + b'TKN'.hex().ljust(64, '0')
+            else:
+                result = _word(6 if selector == SEL_DECIMALS else 10 ** 6)
+            return {"jsonrpc": "2.0", "id": request.get('id'), "result": "0x" + result}
+        if selector == SEL_AGGREGATE3:
+            # aggregate3 calldata: selector, array offset, then the call count
+            n = int(request['params'][0]['data'][2 + 8 + 64:2 + 8 + 128], 16)
+            result = _word(0x20) + _word(n) + ''.join(_word(n * 32 + i * 128) for i in range(n))
+            result += (_word(1) + _word(0x40) + _word(32) + _word(10 ** 18)) * n
+            return {"jsonrpc": "2.0", "id": request.get('id'), "result": "0x" + result}
+        return {"jsonrpc": "2.0", "id": request.get('id'), "result": hex(10 ** 18)}
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        time.sleep(self.latency)
+        if isinstance(request, list):
+            response = [self.answer(item) for item in reversed(request)]
+        else:
+            response = self.answer(request)
+        body = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def start_stub_server(handler=StubRPCHandler):
+    """Start the stub RPC server on a free local port; returns (server, url)"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def benchmark(count=200, workers=DEFAULT_WORKERS):
+    """Compare serial one-shot requests with pooled, batched and multicall fetching"""
+    server, url = start_stub_server()
+    wallets = [('stub', f"0x{i:040x}") for i in range(count)]
+    latency_ms = StubRPCHandler.latency * 1000
+    print(f"📊 Fetching {count} balances from a local stub RPC ({latency_ms:.0f} ms latency)")
+
+    StubRPCHandler.connections = 0
+    start = time.perf_counter()
+    for _, address in wallets:
+        payload = {"jsonrpc": "2.0", "method": "eth_getBalance", "params": [address, "latest"], "id": 1}
+        requests.post(url, json=payload, timeout=TIMEOUT).json()
+    elapsed = time.perf_counter() - start
+    print(f"   serial  {elapsed:6.2f}s  {StubRPCHandler.connections:>3} connections")
+
+    StubRPCHandler.connections = 0
+    start = time.perf_counter()
+    results = fetch_balances(wallets, workers, rpcs={'stub': url}, batch_size=1)
+    elapsed = time.perf_counter() - start
+    ok = sum(1 for balance in results if isinstance(balance, float))
+    print(f"   pooled  {elapsed:6.2f}s  {StubRPCHandler.connections:>3} connections"
+          f"  ({ok}/{count} ok, {PER_HOST_LIMIT} per host)")
+
+    for label, options in (('batched', {'batch_size': BATCH_SIZE}), ('multicall', {'multicall': True})):
+        StubRPCHandler.connections = 0
+        start = time.perf_counter()
+        results = fetch_balances(wallets, workers, rpcs={'stub': url}, **options)
+        elapsed = time.perf_counter() - start
+        ok = sum(1 for balance in results if isinstance(balance, float))
+        print(f"   {label:<9}{elapsed:5.2f}s  {StubRPCHandler.connections:>3} connections  ({ok}/{count} ok)")
+    server.shutdown()
+
+def get_block_numbers(chains, workers=DEFAULT_WORKERS, rpcs=RPCS):
+    """Latest block number per EVM chain; chains that fail are left out"""
+    def block(chain):
+        try:
+            return chain, int(rpc_call(rpcs[chain], "eth_blockNumber", [])['result'], 16)
+        except Exception:
+            return chain, None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return {chain: number for chain, number in pool.map(block, chains) if number is not None}
+
+def print_rpc_stats():
+    """Print request rates per chain"""
+    names = {rpc: chain for chain, rpc in RPCS.items()}
+    for rpc, (requests_per_min, calls_per_min, total) in sorted(rpc_stats.rates().items()):
+        name = names.get(rpc, urlsplit(rpc).netloc)
+        print(f"📈 {name:<9} {requests_per_min:6.1f} req/min  {calls_per_min:6.1f} calls/min  ({total} calls)")
+
+def report_delta(chain, address, old, new, price, symbol=None):
+    """Print one balance change"""
+    symbol = symbol or chain.upper()
+    label = f"{chain.upper()} {address[:6]}...{address[-4:]}"
+    if not isinstance(new, float):
+        print(f"❌ {label}: {new}")
+    elif not isinstance(old, float):
+        print(f"◈  {label}: {new:.4f} {symbol}  (${new * price:,.2f})")
+    else:
+        change = new - old
+        arrow, sign = ("🔺", "+") if change > 0 else ("🔻", "-")
+        print(f"{arrow} {label}: {old:.4f} → {new:.4f} {symbol}  ({change:+.4f}, {sign}${abs(change) * price:,.2f})")
+
+def watch(wallet_data, cold=(), token_list=None, workers=DEFAULT_WORKERS, batch_size=BATCH_SIZE,
+          multicall=False, hot_interval=HOT_INTERVAL, cold_interval=COLD_INTERVAL):
+    """
+    Poll wallets until interrupted, printing only balance changes.
+    EVM wallets are re-read only when their chain has a block they haven't seen;
+    BTC/SOL wallets are re-read on every due check.
+    """
+    token_list = token_list or {}
+    token_ids = {cg_id for tokens in token_list.values() for cg_id in tokens.values() if cg_id}
+    wallets = list(dict.fromkeys(wallet_data))
+    cold = set(cold)
+    snapshot = {}      # (chain, address[, symbol]) -> last balance or error
+    seen_block = {}    # wallet -> block number it was last read at
+    next_due = dict.fromkeys(wallets, 0)
+    next_stats = time.monotonic() + STATS_INTERVAL
+
+    while True:
+        now = time.monotonic()
+        due = [wallet for wallet in wallets if next_due[wallet] <= now]
+        evm = {chain for chain, _ in due if chain in RPCS and chain not in ('btc', 'sol')}
+        blocks = get_block_numbers(evm, workers)
+
+        refresh = [wallet for wallet in due
+                   if wallet[0] not in blocks or blocks[wallet[0]] != seen_block.get(wallet)]
+        if refresh:
+            prices = get_prices({chain for chain, _ in wallets}, token_ids)
+            balances = fetch_balances(refresh, workers, batch_size=batch_size, multicall=multicall)
+            tokens = fetch_token_balances(refresh, token_list, workers, batch_size=batch_size,
+                                          multicall=multicall)
+            stamp = datetime.now().strftime('%H:%M:%S')
+            changes = []
+            for wallet, balance in zip(refresh, balances):
+                chain, address = wallet
+                if wallet[0] in blocks:
+                    seen_block[wallet] = blocks[chain]
+                if balance != snapshot.get(wallet):
+                    changes.append((chain, address, snapshot.get(wallet), balance,
+                                    get_usd_price(chain, prices), None))
+                    snapshot[wallet] = balance
+                if chain not in token_list or not isinstance(balance, float):
+                    continue
+                held = {symbol: (amount, cg_id) for symbol, amount, cg_id in tokens.get(wallet, [])}
+                symbols = held.keys() | {key[2] for key in snapshot if key[:2] == wallet and len(key) == 3}
+                for symbol in sorted(symbols):
+                    amount, cg_id = held.get(symbol, (0.0, None))
+                    key = (chain, address, symbol)
+                    if amount != snapshot.get(key, 0.0):
+                        price = prices.get(cg_id, {}).get('usd', 0) if cg_id else 0
+                        changes.append((chain, address, snapshot.get(key), amount, price, symbol))
+                        snapshot[key] = amount
+            if changes:
+                print(f"— {stamp}")
+                for change in changes:
+                    report_delta(*change)
+
+        for wallet in due:
+            next_due[wallet] = now + (cold_interval if wallet in cold else hot_interval)
+
+        if time.monotonic() >= next_stats:
+            print_rpc_stats()
+            next_stats = time.monotonic() + STATS_INTERVAL
+
+        time.sleep(max(min(next_due.values()) - time.monotonic(), 0.5))
+
 def main():
-    if len(sys.argv) < 2:
+    global PER_HOST_LIMIT
+
+    parser = argparse.ArgumentParser(description='Track wallet balances across chains')
+    parser.add_argument('wallets', nargs='*', help='address or chain:address')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Concurrent requests in total')
+    parser.add_argument('--per-host', type=int, default=PER_HOST_LIMIT, help='Concurrent requests per RPC host')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help='eth_getBalance calls per JSON-RPC batch (1 = no batching)')
+    parser.add_argument('--multicall', action='store_true',
+                        help='Fetch EVM balances through Multicall3 getEthBalance')
+    parser.add_argument('--tokens', action='store_true', help='Also scan ERC-20 token balances')
+    parser.add_argument('--tokens-file', help='JSON token list {chain: {contract: coingecko_id}}')
+    parser.add_argument('--watch', action='store_true', help='Keep running and print only balance changes')
+    parser.add_argument('--cold', action='append', default=[], metavar='WALLET',
+                        help='Poll this wallet every --cold-interval instead (repeatable)')
+    parser.add_argument('--hot-interval', type=float, default=HOT_INTERVAL,
+                        help=f'Seconds between checks of hot wallets (default: {HOT_INTERVAL})')
+    parser.add_argument('--cold-interval', type=float, default=COLD_INTERVAL,
+                        help=f'Seconds between checks of cold wallets (default: {COLD_INTERVAL})')
+    parser.add_argument('--benchmark', action='store_true', help='Benchmark against a local stub RPC and exit')
+    args = parser.parse_args()
+    PER_HOST_LIMIT = args.per_host
+
+    if args.benchmark:
+        benchmark(workers=args.workers)
+        return
+
+    if not args.wallets and not args.cold:
         print("Usage: python3 wallet_monitor.py <address> [chain:address2] ...")
         print("Chains: eth, bsc, polygon, arbitrum, optimism, avax, sol, btc")
         print("Examples:")
@@ -130,69 +817,43 @@ def main():
         print("  python3 wallet_monitor.py eth:0x... btc:bc1q... bsc:0x...")
         sys.exit(1)
     
-    wallets = sys.argv[1:]
-    
     # Parse and collect chains
     chains = []
     wallet_data = []
-    for arg in wallets:
+    for arg in args.wallets + args.cold:
         chain, address = parse_wallet(arg)
         chains.append(chain)
         wallet_data.append((chain, address))
     
-    # Fetch prices once
-    prices = get_prices(set(chains))
+    token_list = load_token_list(args.tokens_file) if args.tokens or args.tokens_file else {}
+    
+    if args.watch:
+        hot = len(args.wallets)
+        print(f"👀 Watching {hot} hot / {len(args.cold)} cold wallets... Press Ctrl+C to stop")
+        try:
+            watch(wallet_data, wallet_data[hot:], token_list, args.workers, args.batch_size,
+                  args.multicall, args.hot_interval, args.cold_interval)
+        except KeyboardInterrupt:
+            print()
+            print_rpc_stats()
+            print("👋 Stopped")
+        return
+    token_ids = {cg_id for tokens in token_list.values() for cg_id in tokens.values() if cg_id}
+    
+    # Fetch prices once (native coins and tokens together), balances concurrently
+    prices = get_prices(set(chains), token_ids)
+    balances = fetch_balances(wallet_data, args.workers, batch_size=args.batch_size,
+                              multicall=args.multicall)
+    tokens = fetch_token_balances(wallet_data, token_list, args.workers, batch_size=args.batch_size,
+                                  multicall=args.multicall)
     
     print(f"📊 Crypto Wallet Monitor - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("=" * 70)
     
     total_usd = 0
-    
-    for chain, address in wallet_data:
-        if chain == 'btc':
-            balance = get_btc_balance(address)
-            if isinstance(balance, float):
-                usd_price = prices.get('bitcoin', {}).get('usd', 0)
-                usd_value = balance * usd_price
-                print(f"₿  BTC {address[:8]}...{address[-6:]}: {balance:.6f} BTC  (${usd_value:,.2f})")
-                total_usd += usd_value
-            else:
-                print(f"❌ BTC {address}: {balance}")
-        elif chain == 'sol':
-            # Simple SOL balance check via RPC
-            try:
-                payload = {
-                    "jsonrpc": "2.0",
-                    "method": "getBalance",
-                    "params": [address],
-                    "id": 1
-                }
-                response = requests.post(RPCS["sol"], json=payload, timeout=10)
-                data = response.json()
-                if 'result' in data:
-                    lamports = data['result']['value']
-                    balance = lamports / 1e9
-                    usd_price = get_usd_price(chain, prices)
-                    usd_value = balance * usd_price
-                    print(f"◎  SOL {address[:8]}...{address[-4:]}: {balance:.4f} SOL  (${usd_value:,.2f})")
-                    total_usd += usd_value
-                else:
-                    print(f"❌ SOL {address}: {data.get('error', 'Unknown error')}")
-            except Exception as e:
-                print(f"❌ SOL {address}: Error - {str(e)[:30]}")
-        else:
-            rpc = RPCS.get(chain)
-            if not rpc:
-                print(f"❌ Unknown chain: {chain}")
-                continue
-            balance = get_eth_balance(address, rpc)
-            if isinstance(balance, float):
-                usd_price = get_usd_price(chain, prices)
-                usd_value = balance * usd_price
-                print(f"◈  {chain.upper()} {address[:6]}...{address[-4:]}: {balance:.4f} {chain.upper()}  (${usd_value:,.2f})")
-                total_usd += usd_value
-            else:
-                print(f"❌ {chain.upper()} {address}: {balance}")
+    for (chain, address), balance in zip(wallet_data, balances):
+        total_usd += report_wallet(chain, address, balance, prices)
+        total_usd += report_tokens(tokens.get((chain, address), []), prices)
     
     print("=" * 70)
     print(f"💰 Total Portfolio Value: ${total_usd:,.2f} USD")